@@ -1,171 +1,202 @@
 #!/usr/bin/env python
 # Based on msgfmt.py from Python generic tools
 
+import argparse
+import array
 import os
-import sys
+import re
 import struct
-import array
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import re
 
-def generate():
+MAGIC = 0x950412de
+HEADER_SIZE = 28
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+ESCAPE_RE = re.compile(r'\\(.)')
+
+
+def unescape(s):
+    """Undo PO string escaping in a single pass, so '\\\\n' stays a backslash followed by 'n'."""
+    return ESCAPE_RE.sub(lambda m: ESCAPES.get(m.group(1), m.group(0)), s)
+
+
+def generate(force=False, workers=None):
     """
     Generate binary .mo files for all .po files in the locale directory.
+
+    Files whose .mo is newer than the .po are skipped unless force is set.
+    Languages are compiled in parallel.
     """
     base_dir = Path('.')
     locale_dir = base_dir / 'locale'
-    
-    version = 0
-    
-    for polang_dir in locale_dir.iterdir():
+
+    jobs = []
+    for polang_dir in sorted(locale_dir.iterdir()):
         if not polang_dir.is_dir():
             continue
-            
+
         lc_messages = polang_dir / 'LC_MESSAGES'
         if not lc_messages.is_dir():
             continue
-            
+
         for po_file in lc_messages.glob('*.po'):
             mo_file = po_file.with_suffix('.mo')
-            print(f"Compiling {po_file} -> {mo_file}")
-            make(po_file, mo_file)
+            if not force and mo_file.exists() and mo_file.stat().st_mtime >= po_file.stat().st_mtime:
+                print(f"Up to date: {mo_file}")
+                continue
+            jobs.append((po_file, mo_file))
 
-def make(filename, outfile):
+    if not jobs:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for po_file, mo_file, count in pool.map(_compile, jobs):
+            print(f"Compiled {po_file} -> {mo_file} ({count} messages)")
+
+
+def _compile(job):
+    po_file, mo_file = job
+    return po_file, mo_file, make(po_file, mo_file)
+
+
+def read_po(filename, obsolete=False):
+    """
+    Parse a .po file into an ordered {msgid: msgstr} dict of decoded strings.
+    The header entry is kept under the empty msgid. With obsolete=True the
+    "#~" entries are read as well.
+    """
     ID = 1
     STR = 2
 
     messages = {}
-    
-    # Simple PO parser
+    section = None
+    msgid = []
+    msgstr = []
+
     with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+        for l in f:
+            l = l.strip()
+            if obsolete and l.startswith('#~ '):
+                l = l[3:].strip()
+            if not l or l.startswith('#'):
+                continue
 
-    section = None
-    msgid = b''
-    msgstr = b''
+            if l.startswith('msgid '):
+                if section == STR:
+                    messages[''.join(msgid)] = ''.join(msgstr)
+                section = ID
+                msgid = [unescape(l[6:].strip()[1:-1])]
+                msgstr = []
+            elif l.startswith('msgstr '):
+                section = STR
+                msgstr = [unescape(l[7:].strip()[1:-1])]
+            elif l.startswith('"') and l.endswith('"'):
+                # Continue strings (multiline)
+                if section == ID:
+                    msgid.append(unescape(l[1:-1]))
+                elif section == STR:
+                    msgstr.append(unescape(l[1:-1]))
 
+    if section == STR:
+        messages[''.join(msgid)] = ''.join(msgstr)
 
-    def unescape(s):
-        return s.replace(r'\"', '"').replace(r'\n', '\n').replace(r'\\', '\\')
+    return messages
 
-    for l in lines:
-        l = l.strip()
-        if not l:
-            continue
-        if l.startswith('#'):
-            continue
-            
-        # Handle quoted strings
-        match = re.search(r'^msgid\s+"(.*)"$', l)
-        if match:
-            if section == STR:
-                messages[msgid] = msgstr
-            section = ID
-            msgid = unescape(match.group(1)).encode('utf-8')
-            msgstr = b''
-            continue
 
-        match = re.search(r'^msgstr\s+"(.*)"$', l)
-        if match:
-            section = STR
-            msgstr = unescape(match.group(1)).encode('utf-8')
-            continue
-            
-        # Continue strings (multiline)
-        match = re.search(r'^"(.*)"$', l)
-        if match:
-            if section == ID:
-                msgid += unescape(match.group(1)).encode('utf-8')
-            elif section == STR:
-                msgstr += unescape(match.group(1)).encode('utf-8')
+def hashpjw(data):
+    """The ELF/PJW string hash used by GNU gettext for the .mo hash table."""
+    hval = 0
+    for c in data:
+        hval = ((hval << 4) + c) & 0xffffffff
+        g = hval & 0xf0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
 
-    if section == STR:
-        messages[msgid] = msgstr
 
+def next_prime(n):
+    n |= 1
+    while True:
+        if all(n % d for d in range(3, int(n ** 0.5) + 1, 2)):
+            return n
+        n += 2
+
+
+def make(filename, outfile):
     # Filter out empty translations (except the header which has empty msgid)
-    # If msgstr is empty and msgid is NOT empty, it means untranslated.
-    # We should exclude it so gettext falls back to msgid.
-    final_messages = {}
-    for mid, mstr in messages.items():
-        if mid == b'' or mstr != b'':
-            final_messages[mid] = mstr
-            
-    messages = final_messages
-
-    # Compute binary data
-    keys = sorted(messages.keys())
-    offsets = []
-    ids = b''
-    strs = b''
-    
-    for id in keys:
-        # For each string, we need offset and length
-        # IDs
-        offsets.append((len(ids), len(id), len(strs), len(messages[id])))
-        ids += id + b'\0'
-        strs += messages[id] + b'\0'
-        
-    output_count = len(keys)
-    
-    # Header: magic, version, count, start_of_msgidx, start_of_msgstr, 0, 0
-    keystart = 7 * 4 + 16 * output_count # Header depends on count? No.
-    # Header is 28 bytes usually (7 integers) if I recall?
-    # Python struct: I I I I I I I
-    
-    # magic = 0x950412de
-    # version = 0
-    # number of strings
-    # offset of table with original strings
-    # offset of table with translation strings
-    # size of hashing table
-    # offset of hashing table
-    
-    magic = 0x950412de
-    version = 0
-    
-    # 7 * 4 bytes for header
-    # 2 * 4 bytes * count for offsets
-    
-    header_size = 28
-    
-    start_of_msgidx = header_size
-    start_of_msgstr = start_of_msgidx + (8 * output_count)
-    
-    # The actual strings start after the tables
-    start_of_data = start_of_msgstr + (8 * output_count)
-    
-    # Pack header
-    # magic, version, count, msgidx_off, msgstr_off, hash_size, hash_off
-    header = struct.pack('Iiiiiii', 
-                         magic, 
-                         version, 
-                         output_count, 
-                         start_of_msgidx, 
-                         start_of_msgstr, 
-                         0, 0)
-                         
-    # Pack tables
-    # O1, L1, O2, L2 ...
-    # Offsets in table are OFFSETS FROM START OF FILE found in ids/strs blob
-    # ids blob starts at start_of_data
-    # strs blob starts at start_of_data + len(ids)
-    
-    idx_content = b''
-    str_content = b''
-    
-    current_ids_addr = start_of_data
-    current_strs_addr = start_of_data + len(ids)
-    
-    for (id_off, id_len, str_off, str_len) in offsets:
-        idx_content += struct.pack('ii', id_len, current_ids_addr + id_off)
-        str_content += struct.pack('ii', str_len, current_strs_addr + str_off)
-    
-    with open(outfile, 'wb') as f:
-        f.write(header)
-        f.write(idx_content)
-        f.write(str_content)
-        f.write(ids)
-        f.write(strs)
-        
+    # so gettext falls back to the msgid.
+    messages = {
+        mid.encode('utf-8'): mstr.encode('utf-8')
+        for mid, mstr in read_po(filename).items()
+        if mid == '' or mstr != ''
+    }
+
+    keys = sorted(messages)
+    count = len(keys)
+    values = [messages[k] for k in keys]
+
+    # Layout: header, msgid table, msgstr table, hash table, msgid blob, msgstr blob
+    hash_size = max(3, next_prime(count * 4 // 3))
+    start_of_msgidx = HEADER_SIZE
+    start_of_msgstr = start_of_msgidx + 8 * count
+    start_of_hash = start_of_msgstr + 8 * count
+    start_of_ids = start_of_hash + 4 * hash_size
+    ids_size = sum(len(k) + 1 for k in keys)
+    start_of_strs = start_of_ids + ids_size
+    strs_size = sum(len(v) + 1 for v in values)
+
+    # Length/offset pairs, built in preallocated arrays
+    id_table = array.array('I', bytes(8 * count))
+    str_table = array.array('I', bytes(8 * count))
+    hash_table = array.array('I', bytes(4 * hash_size))
+
+    offset = start_of_ids
+    for i, key in enumerate(keys):
+        id_table[2 * i] = len(key)
+        id_table[2 * i + 1] = offset
+        offset += len(key) + 1
+
+    offset = start_of_strs
+    for i, value in enumerate(values):
+        str_table[2 * i] = len(value)
+        str_table[2 * i + 1] = offset
+        offset += len(value) + 1
+
+    for i, key in enumerate(keys):
+        hval = hashpjw(key)
+        index = hval % hash_size
+        increment = 1 + hval % (hash_size - 2)
+        while hash_table[index]:
+            index += increment
+            if index >= hash_size:
+                index -= hash_size
+        hash_table[index] = i + 1
+
+    if sys.byteorder == 'big':
+        for table in (id_table, str_table, hash_table):
+            table.byteswap()
+
+    output = bytearray(start_of_strs + strs_size)
+    struct.pack_into('<7I', output, 0, MAGIC, 0, count, start_of_msgidx, start_of_msgstr, hash_size, start_of_hash)
+    output[start_of_msgidx:start_of_msgstr] = id_table.tobytes()
+    output[start_of_msgstr:start_of_hash] = str_table.tobytes()
+    output[start_of_hash:start_of_ids] = hash_table.tobytes()
+    # NUL separators are already in place in the zero-filled buffer
+    output[start_of_ids:start_of_strs - 1] = b'\0'.join(keys) if keys else b''
+    output[start_of_strs:len(output) - 1] = b'\0'.join(values) if values else b''
+
+    tmp = Path(f'{outfile}.tmp')
+    tmp.write_bytes(output)
+    os.replace(tmp, outfile)
+    return count
+
+
 if __name__ == "__main__":
-    generate()
+    parser = argparse.ArgumentParser(description="Compile locale/*/LC_MESSAGES/*.po into .mo files")
+    parser.add_argument('--force', action='store_true', help="Recompile even if the .mo is up to date")
+    parser.add_argument('--workers', type=int, default=None, help="Parallel compiler processes")
+    args = parser.parse_args()
+    generate(force=args.force, workers=args.workers)
@@ -1,15 +1,178 @@
-from django.contrib import admin
-from .models import Woman, Section, Issue, Appearance, IssueCover
+from datetime import date
+from django import forms
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import Q
+from django.template.response import TemplateResponse
+from django.utils.translation import gettext_lazy as _
+from .models import Woman, Section, SectionAlias, Issue, Appearance, IssueCover, ImportJob
+from .signals import batched_appearance_changes
+
+class MoveToSectionForm(forms.Form):
+    section = forms.ModelChoiceField(queryset=Section.objects.order_by('name'), label=_("Section"))
+
+class MergeForm(forms.Form):
+    target = forms.ModelChoiceField(queryset=None, label=_("Keep"))
+
+    def __init__(self, *args, choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['target'].queryset = choices
+
+def _selection(request):
+    # Intermediate action pages post back to the same changelist URL, so
+    # "select all" only needs the flag, not every primary key
+    return {
+        'action': request.POST.get('action'),
+        'select_across': request.POST.get('select_across') == '1',
+        'selected': request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+        'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+    }
 
 class IssueCoverInline(admin.TabularInline):
     model = IssueCover
     extra = 1
 
+class WomanAdmin(admin.ModelAdmin):
+    search_fields = ['^name']
+    ordering = ['name']
+    show_full_result_count = False
+    actions = ['merge_women']
+
+    @admin.action(description=_("Merge selected women"))
+    def merge_women(self, request, queryset):
+        women = queryset.order_by('name')
+        if women.count() < 2:
+            self.message_user(request, _("Select at least two women to merge."), messages.WARNING)
+            return None
+
+        form = MergeForm(request.POST if 'apply' in request.POST else None, choices=women)
+        if form.is_valid():
+            target = form.cleaned_data['target']
+            others = list(women.exclude(pk=target.pk).values_list('pk', flat=True))
+            with transaction.atomic(), batched_appearance_changes():
+                # One UPDATE moves every appearance; the merged women are then empty
+                moved = Appearance.objects.filter(woman__in=others).update(woman=target)
+                Woman.objects.filter(pk__in=others).delete()
+            self.message_user(request, _("Merged %(count)d women into %(name)s (%(moved)d appearances moved).") % {
+                'count': len(others), 'name': target.name, 'moved': moved,
+            })
+            return None
+
+        return TemplateResponse(request, 'admin/core/woman/merge_women.html', {
+            **self.admin_site.each_context(request),
+            'title': _("Merge women"),
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': women,
+            **_selection(request),
+        })
+
+class SectionAliasInline(admin.TabularInline):
+    model = SectionAlias
+    extra = 0
+
+class SectionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key']
+    search_fields = ['^name']
+    ordering = ['name']
+    inlines = [SectionAliasInline]
+    actions = ['merge_sections']
+
+    @admin.action(description=_("Merge selected sections"))
+    def merge_sections(self, request, queryset):
+        sections = queryset.order_by('name')
+        if sections.count() < 2:
+            self.message_user(request, _("Select at least two sections to merge."), messages.WARNING)
+            return None
+
+        form = MergeForm(request.POST if 'apply' in request.POST else None, choices=sections)
+        if form.is_valid():
+            target = form.cleaned_data['target']
+            sources = list(sections.exclude(pk=target.pk))
+            moved = Section.objects.merge(target, sources)
+            self.message_user(request, _("Merged %(count)d sections into %(name)s (%(moved)d appearances moved).") % {
+                'count': len(sources), 'name': target.name, 'moved': moved,
+            })
+            return None
+
+        return TemplateResponse(request, 'admin/core/section/merge_sections.html', {
+            **self.admin_site.each_context(request),
+            'title': _("Merge sections"),
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': sections,
+            **_selection(request),
+        })
+
 class IssueAdmin(admin.ModelAdmin):
     inlines = [IssueCoverInline]
     ordering = ['publishing_date']
+    date_hierarchy = 'publishing_date'
+    search_fields = ['=edition']
+
+    def get_search_results(self, request, queryset, search_term):
+        # A number is an edition or, when it looks like one, a year
+        term = search_term.strip()
+        if term.isdigit():
+            value = int(term)
+            q = Q(edition=value)
+            if 1000 <= value <= 9999:
+                q |= Q(publishing_date__gte=date(value, 1, 1), publishing_date__lt=date(value + 1, 1, 1))
+            return queryset.filter(q), False
+        return super().get_search_results(request, queryset, search_term)
+
+class AppearanceAdmin(admin.ModelAdmin):
+    list_display = ['woman', 'issue', 'section']
+    list_select_related = ['woman', 'issue', 'section']
+    autocomplete_fields = ['woman', 'issue', 'section']
+    search_fields = ['^woman__name']
+    date_hierarchy = 'issue__publishing_date'
+    show_full_result_count = False
+    actions = ['move_to_section']
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic(), batched_appearance_changes():
+            super().delete_queryset(request, queryset)
+
+    @admin.action(description=_("Move selected appearances to another section"))
+    def move_to_section(self, request, queryset):
+        form = MoveToSectionForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            section = form.cleaned_data['section']
+            count = queryset.update(section=section)
+            self.message_user(request, _("Moved %(count)d appearances to %(section)s.") % {
+                'count': count, 'section': section.name,
+            })
+            return None
+
+        return TemplateResponse(request, 'admin/core/appearance/move_to_section.html', {
+            **self.admin_site.each_context(request),
+            'title': _("Move to section"),
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': queryset.select_related('woman', 'issue', 'section')[:100],
+            'count': queryset.count(),
+            **_selection(request),
+        })
+
+class IssueCoverAdmin(admin.ModelAdmin):
+    list_display = ['issue', 'image']
+    list_select_related = ['issue']
+    autocomplete_fields = ['issue']
+    date_hierarchy = 'issue__publishing_date'
+    show_full_result_count = False
+
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'file', 'status', 'created_at', 'rows_inserted', 'rows_skipped', 'errors']
+    list_filter = ['status']
+    readonly_fields = [
+        'status', 'created_at', 'started_at', 'finished_at',
+        'rows_parsed', 'rows_inserted', 'rows_skipped', 'errors', 'log',
+    ]
 
-admin.site.register(Woman)
-admin.site.register(Section)
+admin.site.register(Woman, WomanAdmin)
+admin.site.register(Section, SectionAdmin)
 admin.site.register(Issue, IssueAdmin)
-admin.site.register(Appearance)
+admin.site.register(Appearance, AppearanceAdmin)
+admin.site.register(IssueCover, IssueCoverAdmin)
+admin.site.register(ImportJob, ImportJobAdmin)
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Connect the signal receivers (ingest starts the import worker on the first request)
+        from . import signals, changes, coappearances, dimensions, ingest, stats, sweeper  # noqa: F401
+
+        if settings.WARMUP:
+            # The database phases wait for the warmup command: queries are not allowed during app loading
+            from . import warmup
+            warmup.run(database=False)
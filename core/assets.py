@@ -0,0 +1,46 @@
+import re
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+# Bundled asset name -> source files, in load order
+BUNDLES = {
+    'css': ('core/bundle.css', [
+        'core/css/style.css',
+        'core/css/pagination.css',
+        'core/css/ui_refinements.css',
+        'core/css/modal.css',
+        'core/css/covers.css',
+    ]),
+    'js': ('core/bundle.js', [
+        'core/js/modal.js',
+        'core/js/covers.js',
+    ]),
+}
+
+# Text files worth precompressing when served by the front proxy
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};:,>])\s*', r'\1', source)
+    source = source.replace(';}', '}')
+    return source.strip()
+
+
+def minify_js(source):
+    # JS needs a tokenizer (strings, template literals, regexes): without rJSmin
+    # the bundle is only concatenated
+    if rjsmin is None:
+        return source
+    return rjsmin.jsmin(source)
+
+
+MINIFIERS = {
+    'css': minify_css,
+    'js': minify_js,
+}
@@ -0,0 +1,127 @@
+"""
+Async versions of the public read views and the import progress stream.
+
+They produce the same pages as their counterparts in core.views but load
+everything through the async ORM before rendering, so templates never
+touch the database. Under ASGI a slow client then costs a suspended
+coroutine instead of a worker thread. core.urls routes to these when
+settings.ASYNC_READ_VIEWS is on.
+"""
+import asyncio
+import time
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Prefetch
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.views import View
+from .coappearances import top_co_stars
+from .models import Woman, Issue, Appearance, ImportJob
+from .views import (
+    SSE_KEEPALIVE_SECONDS, SSE_MAX_SECONDS, SSE_POLL_SECONDS,
+    issue_appearances, issue_grid, normalize_text, section_groups, sse_event, sse_response, year_navigation,
+)
+
+
+class WomanListView(View):
+    template_name = 'core/woman_list.html'
+    paginate_by = 20
+
+    async def get(self, request, *args, **kwargs):
+        query = request.GET.get('q')
+        queryset = Woman.objects.all()
+        if query:
+            # Check for exact match (case-insensitive) to redirect
+            exact_match = await Woman.objects.filter(name__iexact=query).afirst()
+            if exact_match:
+                return redirect('woman_detail', pk=exact_match.pk)
+            queryset = queryset.filter(name__icontains=query)
+
+        # Sort in Python to handle accents correctly (SQLite limitation)
+        women = sorted([w async for w in queryset], key=lambda w: normalize_text(w.name))
+
+        paginator = Paginator(women, self.paginate_by)
+        try:
+            page = paginator.page(request.GET.get('page') or 1)
+        except InvalidPage as e:
+            raise Http404(str(e))
+
+        return render(request, self.template_name, {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'women': page.object_list,
+        })
+
+
+class WomanDetailView(View):
+    template_name = 'core/woman_detail.html'
+
+    async def get(self, request, pk):
+        woman = await aget_object_or_404(
+            Woman.objects.prefetch_related(
+                Prefetch('appearance_set', queryset=Appearance.objects.select_related('issue', 'section'))
+            ),
+            pk=pk,
+        )
+        co_stars = [pair async for pair in top_co_stars(woman)]
+        return render(request, self.template_name, {'object': woman, 'woman': woman, 'co_stars': co_stars})
+
+
+class IssueListView(View):
+    template_name = 'core/issue_list.html'
+
+    async def get(self, request, *args, **kwargs):
+        years = sorted({d.year async for d in Issue.objects.dates('publishing_date', 'year', order='ASC')})
+        context = {'issues': [], 'object_list': []}
+        if years:
+            year_param = request.GET.get('year')
+            current_year = int(year_param) if year_param and year_param.isdigit() else years[0]
+            if current_year not in years:
+                current_year = years[0]
+
+            issues = [
+                issue async for issue in
+                issue_grid(Issue.objects.filter(publishing_date__year=current_year).order_by('publishing_date'))
+            ]
+            context.update(year_navigation(years, current_year), issues=issues, object_list=issues)
+        return render(request, self.template_name, context)
+
+
+class IssueDetailView(View):
+    template_name = 'core/issue_detail.html'
+
+    async def get(self, request, pk):
+        issue = await aget_object_or_404(Issue.objects.prefetch_related('covers'), pk=pk)
+        appearances = [app async for app in issue_appearances(issue)]
+        return render(request, self.template_name, {
+            'object': issue,
+            'issue': issue,
+            'sections_data': section_groups(appearances),
+        })
+
+
+class ImportJobEventsView(View):
+    """Import progress as Server-Sent Events; waiting costs a coroutine, not a thread."""
+
+    async def get(self, request, pk):
+        await aget_object_or_404(ImportJob, pk=pk)
+        return sse_response(self.events(pk))
+
+    async def events(self, pk):
+        yield 'retry: 2000\n\n'
+        last, last_sent = None, time.monotonic()
+        deadline = last_sent + SSE_MAX_SECONDS
+        while time.monotonic() < deadline:
+            job = await ImportJob.objects.aget(pk=pk)
+            progress = job.progress()
+            if progress != last:
+                yield sse_event(progress)
+                last, last_sent = progress, time.monotonic()
+            elif time.monotonic() - last_sent > SSE_KEEPALIVE_SECONDS:
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+            if job.finished:
+                yield sse_event(progress, event='end')
+                return
+            await asyncio.sleep(SSE_POLL_SECONDS)
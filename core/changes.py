@@ -0,0 +1,84 @@
+"""
+Change feed: which catalogue rows were inserted, updated or deleted since a cursor.
+
+Every write to a TRACKED model adds Change rows in the same transaction:
+signals cover ordinary saves and deletes, and the bulk paths that bypass
+them (AppearanceQuerySet.update, fast_delete, import_covers, snapshots)
+call record() or record_where() themselves. The Change id only grows, so a
+consumer keeps the cursor of the last change it applied and asks for the
+ones after it (ChangesView, or the changes command).
+
+feed() sends each change with the row as it is now, not as it was then: a
+row changed several times carries its latest state each time, and a row
+deleted since carries none (its delete follows later in the feed).
+"""
+from itertools import islice
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Appearance, Change, Issue, IssueCover, Section, Woman
+
+TRACKED = {model._meta.model_name: model for model in (Woman, Section, Issue, IssueCover, Appearance)}
+BATCH_SIZE = 500
+
+
+def record(model, pks, action):
+    """Log action for the given rows of model."""
+    name = model._meta.model_name
+    Change.objects.bulk_create(
+        [Change(model=name, object_id=pk, action=action) for pk in pks], batch_size=BATCH_SIZE
+    )
+
+
+def record_where(cursor, model, where, params, action):
+    """Log action for every row of model matching a raw SQL condition, with one INSERT ... SELECT."""
+    opts = model._meta
+    cursor.execute(
+        f"INSERT INTO {Change._meta.db_table} (model, object_id, action, recorded_at) "
+        f"SELECT %s, {opts.pk.column}, %s, %s FROM {opts.db_table} WHERE {where}",
+        [opts.model_name, action, connection.ops.adapt_datetimefield_value(timezone.now()), *params],
+    )
+
+
+def feed(since=0, limit=None):
+    """Changes after the cursor since, oldest first, as dicts ready for JSON."""
+    changes = Change.objects.filter(pk__gt=since).order_by('pk').values_list(
+        'pk', 'model', 'object_id', 'action', 'recorded_at'
+    )
+    if limit:
+        changes = changes[:limit]
+    rows = changes.iterator(chunk_size=BATCH_SIZE)
+    while batch := list(islice(rows, BATCH_SIZE)):
+        # Current state of the rows in this batch, one query per model
+        current = {}
+        for name in {change[1] for change in batch}:
+            ids = {change[2] for change in batch if change[1] == name}
+            current[name] = {row['id']: row for row in TRACKED[name].objects.filter(pk__in=ids).values()}
+        for pk, name, object_id, action, recorded_at in batch:
+            yield {
+                'cursor': pk,
+                'model': name,
+                'id': object_id,
+                'action': action,
+                'at': recorded_at.isoformat(),
+                'data': None if action == Change.DELETE else current[name].get(object_id),
+            }
+
+
+@receiver(post_save, sender=Woman)
+@receiver(post_save, sender=Section)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=IssueCover)
+@receiver(post_save, sender=Appearance)
+def row_saved(sender, instance, created, **kwargs):
+    record(sender, [instance.pk], Change.INSERT if created else Change.UPDATE)
+
+
+@receiver(post_delete, sender=Woman)
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=IssueCover)
+@receiver(post_delete, sender=Appearance)
+def row_deleted(sender, instance, **kwargs):
+    record(sender, [instance.pk], Change.DELETE)
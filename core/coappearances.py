@@ -0,0 +1,71 @@
+"""
+Maintenance of the CoAppearance table ("appeared alongside").
+
+The pair counts are always recomputed from Appearance for the women touched
+by a change, so the table converges to the truth whatever the write path.
+"""
+from django.db import connection, transaction
+from django.dispatch import receiver
+from .models import Appearance, CoAppearance
+from .signals import appearances_changed
+
+CHUNK_SIZE = 500
+# Co-stars shown on a woman's page
+TOP_CO_STARS = 10
+
+PAIRS_SQL = (
+    "SELECT a1.woman_id, a2.woman_id, COUNT(DISTINCT a1.issue_id) "
+    "FROM {appearance} a1 "
+    "JOIN {appearance} a2 ON a2.issue_id = a1.issue_id AND a2.woman_id <> a1.woman_id "
+    "{where} "
+    "GROUP BY a1.woman_id, a2.woman_id"
+)
+
+
+def _sql(where=''):
+    return PAIRS_SQL.format(appearance=Appearance._meta.db_table, where=where)
+
+
+def _insert_prefix():
+    return f"INSERT INTO {CoAppearance._meta.db_table} (woman_id, other_id, shared_issues) "
+
+
+def refresh(woman_ids):
+    """Recompute every pair involving the given women."""
+    woman_ids = sorted(set(woman_ids))
+    table = CoAppearance._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(woman_ids), CHUNK_SIZE):
+            chunk = woman_ids[start:start + CHUNK_SIZE]
+            params = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"DELETE FROM {table} WHERE woman_id IN ({params}) OR other_id IN ({params})", chunk + chunk
+            )
+            # Pairs starting at one of the women...
+            cursor.execute(_insert_prefix() + _sql(f"WHERE a1.woman_id IN ({params})"), chunk)
+            # ...and their mirror images, unless the other woman is in this chunk too
+            cursor.execute(
+                _insert_prefix() + _sql(f"WHERE a2.woman_id IN ({params}) AND a1.woman_id NOT IN ({params})"),
+                chunk + chunk,
+            )
+
+
+def rebuild():
+    """Recompute the whole table in one statement."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {CoAppearance._meta.db_table}")
+        cursor.execute(_insert_prefix() + _sql())
+    return CoAppearance.objects.count()
+
+
+def top_co_stars(woman, limit=TOP_CO_STARS):
+    return (
+        CoAppearance.objects.filter(woman=woman)
+        .select_related('other')
+        .order_by('-shared_issues', 'other__name')[:limit]
+    )
+
+
+@receiver(appearances_changed)
+def appearances_changed_receiver(sender, rows, **kwargs):
+    refresh(woman_id for woman_id, _, _ in rows)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.urls import translate_url
+
+# WSGI environ key set by prerender_site's test client. Client headers only
+# reach request.META as HTTP_* keys, so no visitor can set this one.
+PRERENDER_KEY = 'core.prerender'
+
+
+def prerender(request):
+    """
+    Flag pages rendered by the prerender_site command.
+
+    Static copies cannot carry a per-visitor CSRF token, so the language
+    switcher becomes plain links to the same page in each language.
+    """
+    if not request.META.get(PRERENDER_KEY):
+        return {}
+    return {
+        'prerender': True,
+        'language_urls': [(code, translate_url(request.get_full_path(), code)) for code, _ in settings.LANGUAGES],
+    }
@@ -0,0 +1,191 @@
+"""
+Process-local name -> id caches for the Woman and Section dimensions.
+
+Every write path turns typed names into foreign keys: the importers, the
+bulk add view, the appearance forms and the section edit. Both tables are
+small, so each process keeps the whole mapping in memory (loaded with one
+query on first use) and a known name costs no query at all. An unknown name
+goes to the database, creating the row if needed; a concurrent insert of the
+same name is retried as a read instead of surfacing an IntegrityError.
+
+Coherence: a new row only adds a name, so it is cached once its transaction
+commits. Renames and deletes clear this process's cache right away (signals,
+or fast_delete) and bump a CacheVersion row; every process compares that
+version with its own at most every CHECK_INTERVAL seconds and reloads when
+another one changed something. Within that window a cached id may belong to
+a row another process just deleted or merged away; the interactive paths
+(forms, edit views) resolve with verify=True, which confirms a cached id with
+one indexed query and resolves the name again if the row is gone.
+
+Every read here goes to the primary: a replica could hand back the mapping
+from before a version bump, or confirm an id the primary already deleted.
+"""
+import threading
+import time
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import CacheVersion, Section, SectionAlias, Woman, section_key
+
+CHECK_INTERVAL = 1.0
+RETRIES = 3
+
+
+def _primary(model):
+    return model.objects.using(DEFAULT_DB_ALIAS)
+
+
+class NameCache:
+    """Maps a name's lookup key to a row id for one model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model._meta.model_name
+        self._ids = None
+        self._version = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        # Rows created by a transaction still in progress, per thread: not cached until it commits
+        self._local = threading.local()
+
+    def key(self, name):
+        return name
+
+    def rows(self):
+        """(key, id) pairs of every row."""
+        return _primary(self.model).values_list('name', 'pk')
+
+    def create(self, name):
+        return self.model.objects.create(name=name)
+
+    def _uncommitted(self):
+        if not hasattr(self._local, 'pks'):
+            self._local.pks = set()
+        return self._local.pks
+
+    def _stored_version(self):
+        return _primary(CacheVersion).filter(name=self.name).values_list('version', flat=True).first() or 0
+
+    def _current(self):
+        """The cached mapping, (re)loaded when missing or stale."""
+        now = time.monotonic()
+        if self._ids is not None and now - self._checked < CHECK_INTERVAL:
+            return self._ids
+        with self._lock:
+            version = self._stored_version()
+            if self._ids is None or version != self._version:
+                skip = self._uncommitted()
+                self._ids = {key: pk for key, pk in self.rows() if pk not in skip}
+                self._version = version
+            self._checked = now
+            return self._ids
+
+    def resolve(self, name, verify=False):
+        """
+        The id of the row name refers to, creating it if there is none. With
+        verify, a cached id is only returned once the row is known to exist.
+        """
+        key = self.key(name)
+        pk = self._current().get(key)
+        if pk is not None:
+            if not verify or _primary(self.model).filter(pk=pk).exists():
+                return pk
+            # Deleted or merged by another process since the last version check
+            self._ids = None
+        return self._read_or_create(key, name)
+
+    def _read_or_create(self, key, name):
+        for attempt in range(RETRIES):
+            pk = self._lookup(key)
+            if pk is not None:
+                if pk not in self._uncommitted():
+                    self._current()[key] = pk
+                return pk
+            try:
+                with transaction.atomic():
+                    return self.create(name).pk
+            except IntegrityError:
+                # Inserted by someone else since our read: the next pass finds it
+                if attempt == RETRIES - 1:
+                    raise
+
+    def _lookup(self, key):
+        return _primary(self.model).filter(name=key).values_list('pk', flat=True).first()
+
+    def created(self, instance):
+        """A row was inserted: cache it once (and only if) its transaction commits."""
+        pks = self._uncommitted()
+        pks.add(instance.pk)
+
+        def commit():
+            pks.discard(instance.pk)
+            if self._ids is not None:
+                self._ids[self.key(instance.name)] = instance.pk
+
+        transaction.on_commit(commit)
+
+    def invalidate(self):
+        """Drop the cache here and tell the other processes to drop theirs."""
+        self._ids = None
+        updated = CacheVersion.objects.filter(name=self.name).update(version=F('version') + 1)
+        if not updated:
+            CacheVersion.objects.bulk_create([CacheVersion(name=self.name, version=1)], ignore_conflicts=True)
+
+
+class SectionCache(NameCache):
+    """Section keys and alias keys, matched the way Section.objects.resolve always has."""
+
+    def key(self, name):
+        return section_key(name)
+
+    def rows(self):
+        yield from _primary(Section).values_list('key', 'pk')
+        # Aliases win over a section that happens to have the same key
+        yield from _primary(SectionAlias).values_list('key', 'section_id')
+
+    def create(self, name):
+        return Section.objects.create(name=' '.join(name.split()))
+
+    def _lookup(self, key):
+        alias = _primary(SectionAlias).filter(key=key).values_list('section_id', flat=True).first()
+        if alias is not None:
+            return alias
+        return _primary(Section).filter(key=key).values_list('pk', flat=True).first()
+
+
+women = NameCache(Woman)
+sections = SectionCache(Section)
+
+CACHES = {Woman: women, Section: sections, SectionAlias: sections}
+
+
+def woman_id(name, verify=False):
+    return women.resolve(name, verify)
+
+
+def section_id(name, verify=False):
+    return sections.resolve(name, verify)
+
+
+def invalidate(model=None):
+    """Invalidate the cache for model, or all of them (after raw SQL such as fast_delete or snapshot_load)."""
+    for cache in {CACHES[model]} if model else {women, sections}:
+        cache.invalidate()
+
+
+@receiver(post_save, sender=Woman)
+@receiver(post_save, sender=Section)
+def dimension_saved(sender, instance, created, **kwargs):
+    if created:
+        CACHES[sender].created(instance)
+    else:
+        CACHES[sender].invalidate()
+
+
+@receiver(post_save, sender=SectionAlias)
+@receiver(post_delete, sender=Woman)
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=SectionAlias)
+def dimension_changed(sender, **kwargs):
+    CACHES[sender].invalidate()
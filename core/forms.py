@@ -1,4 +1,7 @@
 from django import forms
+from django.conf import settings
+from django.db import transaction
+from . import dimensions, images, sweeper
 from .models import Issue, Appearance, IssueCover
 from datetime import date
 from django.utils.translation import gettext_lazy as _
@@ -146,9 +149,7 @@ class WomanAppearanceForm(forms.ModelForm):
         
         # Handle Section
         section_name = self.cleaned_data.get('section_name')
-        from .models import Section
-        section, _ = Section.objects.get_or_create(name=section_name)
-        instance.section = section
+        instance.section_id = dimensions.section_id(section_name, verify=True)
         
         # Handle Issue
         issue = self.cleaned_data.get('issue')
@@ -189,15 +190,11 @@ class IssueAppearanceForm(forms.ModelForm):
         
         # Handle Woman
         woman_name = self.cleaned_data.get('woman_name')
-        from .models import Woman
-        woman, _ = Woman.objects.get_or_create(name=woman_name)
-        instance.woman = woman
+        instance.woman_id = dimensions.woman_id(woman_name, verify=True)
         
         # Handle Section
         section_name = self.cleaned_data.get('section_name')
-        from .models import Section
-        section, _ = Section.objects.get_or_create(name=section_name)
-        instance.section = section
+        instance.section_id = dimensions.section_id(section_name, verify=True)
         
         if commit:
             instance.save()
@@ -210,3 +207,34 @@ class IssueCoverForm(forms.ModelForm):
     class Meta:
         model = IssueCover
         fields = ['image']
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if image.size > settings.COVER_MAX_BYTES:
+            raise forms.ValidationError(
+                _("The file is larger than %(size)s MB.") % {'size': settings.COVER_MAX_BYTES // 2 ** 20}
+            )
+        try:
+            # Header only: refuses decompression bombs before anything is decoded
+            images.open_image(image)
+        except ValueError as e:
+            raise forms.ValidationError(_("Invalid image: %(error)s") % {'error': e})
+        return image
+
+    def save(self, commit=True):
+        instance = super().save(commit=False)
+        # Store the cover through the ingest policy instead of the upload as is
+        upload = self.cleaned_data['image']
+        instance.content_hash = images.file_hash(upload)
+        name, thumbnail, _size = images.store_cover(upload, upload.name, instance.content_hash)
+        instance.image, instance.thumbnail = name, thumbnail
+        if commit:
+            try:
+                # A savepoint, so the transaction can still queue the files if the insert fails
+                with transaction.atomic():
+                    instance.save()
+            except Exception:
+                # No row refers to the stored files: leave them to the sweeper
+                sweeper.queue_files([name, thumbnail])
+                raise
+        return instance
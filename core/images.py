@@ -0,0 +1,226 @@
+"""
+Cover image processing: validation, the ingest policy, content hashing and thumbnails.
+
+Every way a cover comes in (the upload form, a URL, import_covers) goes
+through store_cover(). Images over settings.COVER_MAX_PIXELS are refused
+from their header, before any pixel is decoded; images larger than
+COVER_MAX_SIDE, not progressive COVER_FORMAT, or carrying metadata (EXIF,
+XMP, comments) are downscaled and re-encoded. Covers that already comply
+are stored byte for byte.
+
+These functions only touch files and storage, never the database, so the
+import_covers and normalise_covers commands can run them in worker processes.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+from PIL import Image, ImageOps, UnidentifiedImageError
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# Fits the issue grid's 3:4 cards at twice their CSS size
+THUMBNAIL_SIZE = (360, 480)
+THUMBNAIL_QUALITY = 85
+MIN_SIDE = 100
+
+HASH_PREFIX = 12
+HASH_SUFFIX = re.compile(r'\.[0-9a-f]{%d}$' % HASH_PREFIX)
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+# Image.info keys of metadata the policy strips (the ICC profile is kept: it is colour, not metadata)
+METADATA = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(f):
+    """Hash of a seekable file, read in chunks; leaves it rewound."""
+    digest = hashlib.sha256()
+    f.seek(0)
+    while chunk := f.read(CHUNK_SIZE):
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(directory, filename, digest, extension):
+    """covers/1990-01_ed1.<12 hex>.jpg: the media view caches such names forever."""
+    stem = HASH_SUFFIX.sub('', os.path.splitext(os.path.basename(filename))[0])
+    return f'{directory}{stem}.{digest[:HASH_PREFIX]}{extension}'
+
+
+def spool(chunks, max_bytes=None):
+    """
+    Copy a stream of byte chunks into a rewound temporary file, kept in memory
+    while small. Raises ValueError as soon as it grows past max_bytes.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            out.close()
+            raise ValueError(f'larger than {max_bytes // 2 ** 20} MB')
+        out.write(chunk)
+    out.seek(0)
+    return out
+
+
+def open_image(source, min_side=MIN_SIDE):
+    """
+    Open and validate image bytes or a seekable file; raises ValueError for
+    anything unusable. Only the header is read: decode() loads the pixels.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as probe:
+            width, height = probe.size
+            if width * height > settings.COVER_MAX_PIXELS:
+                raise ValueError(f'too many pixels ({width}x{height})')
+            # verify() catches truncated files without decoding every pixel, but leaves the image unusable
+            probe.verify()
+        source.seek(0)
+        image = Image.open(source)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ValueError(f'not a valid image ({e})')
+    if min(image.size) < min_side:
+        raise ValueError(f'too small ({image.width}x{image.height})')
+    return image
+
+
+def decode(image, max_side=None):
+    """
+    Load the pixels of an opened image. With max_side, JPEGs are decoded at the
+    smallest DCT scale still larger than that, instead of at full size.
+    """
+    try:
+        if max_side and max(image.size) > max_side:
+            image.draft('RGB', (max_side, max_side))
+        image.load()
+    except (OSError, SyntaxError) as e:
+        raise ValueError(f'not a valid image ({e})')
+    return image
+
+
+def needs_reencoding(image):
+    """Whether an opened image breaks the ingest policy."""
+    return (
+        max(image.size) > settings.COVER_MAX_SIDE
+        or image.format != settings.COVER_FORMAT
+        or (image.format == 'JPEG' and not image.info.get('progressive'))
+        or any(key in image.info for key in METADATA)
+    )
+
+
+def reencode(image):
+    """Bytes of the decoded image upright, within COVER_MAX_SIDE and without metadata, in COVER_FORMAT."""
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((settings.COVER_MAX_SIDE, settings.COVER_MAX_SIDE), Image.LANCZOS)
+
+    options = {'quality': settings.COVER_QUALITY}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if settings.COVER_FORMAT == 'WEBP':
+        image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        options['method'] = 6
+    else:
+        image = image.convert('RGB')
+        options.update(optimize=True, progressive=True)
+    out = io.BytesIO()
+    image.save(out, settings.COVER_FORMAT, **options)
+    return out.getvalue()
+
+
+def make_thumbnail(image):
+    """JPEG bytes of the image, upright, scaled to fit THUMBNAIL_SIZE."""
+    thumb = ImageOps.exif_transpose(image).convert('RGB')
+    thumb.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+    out = io.BytesIO()
+    thumb.save(out, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def store_cover(source, filename, digest, min_side=MIN_SIDE):
+    """
+    Apply the ingest policy to the image in source (a seekable file) and store
+    it and its thumbnail under hashed names. digest is the hash of source, so
+    a cover that is stored unchanged keeps its name. Returns (image name,
+    thumbnail name, stored bytes); raises ValueError for an unusable image.
+    """
+    image = open_image(source, min_side)
+    if needs_reencoding(image):
+        data = reencode(decode(image, settings.COVER_MAX_SIDE))
+        content, digest = ContentFile(data), content_hash(data)
+        extension = EXTENSIONS[settings.COVER_FORMAT]
+    else:
+        decode(image)
+        source.seek(0)
+        content = File(source)
+        extension = EXTENSIONS.get(image.format) or os.path.splitext(filename)[1].lower()
+    size = content.size
+
+    name = default_storage.save(hashed_name('covers/', filename, digest, extension), content)
+    thumbnail = default_storage.save(
+        hashed_name('covers/thumbs/', filename, digest, '.jpg'), ContentFile(make_thumbnail(image))
+    )
+    return name, thumbnail, size
+
+
+def process_cover(path, known_hashes=frozenset()):
+    """
+    Validate, hash, normalise and thumbnail the image file at path, then store
+    it and its thumbnail. Returns a dict with 'path', 'hash', 'bytes' and then
+    either 'duplicate', 'error', or the stored 'image', 'thumbnail' and 'stored'
+    (bytes after the ingest policy).
+    """
+    with open(path, 'rb') as f:
+        result = {'path': path, 'hash': file_hash(f), 'bytes': os.fstat(f.fileno()).st_size}
+        if result['hash'] in known_hashes:
+            result['duplicate'] = True
+            return result
+        try:
+            result['image'], result['thumbnail'], result['stored'] = store_cover(f, path, result['hash'])
+        except ValueError as e:
+            result['error'] = str(e)
+    return result
+
+
+def normalise_stored(name):
+    """
+    Apply the ingest policy to a cover already in storage. Returns a dict with
+    'name' and 'bytes', plus either 'error', or 'image', 'thumbnail' and
+    'stored' when the cover was re-encoded under a new name (the old files
+    are left for the caller to queue for removal).
+    """
+    result = {'name': name, 'bytes': 0}
+    try:
+        with default_storage.open(name) as f:
+            result['bytes'] = f.size
+            # Covers already accepted are not refused again for being small
+            image = open_image(f, min_side=0)
+            if needs_reencoding(image):
+                result['image'], result['thumbnail'], result['stored'] = store_cover(f, name, file_hash(f), min_side=0)
+    except (OSError, ValueError) as e:
+        result['error'] = str(e)
+    return result
+
+
+def hash_stored(name):
+    """(name, content hash) of a file already in storage; the hash is None if the file is missing."""
+    try:
+        with default_storage.open(name) as f:
+            digest = hashlib.sha256()
+            for chunk in f.chunks():
+                digest.update(chunk)
+    except OSError:
+        return name, None
+    return name, digest.hexdigest()
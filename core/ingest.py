@@ -0,0 +1,211 @@
+"""
+CSV ingestion ("Mulher;Mês;Edição;Seção"), shared by the ingest_csv command
+and the web upload.
+
+Uploads are stored as ImportJob rows and run by a background thread of the
+web process, so the request returns at once. Rows are inserted in chunks of
+CHUNK_SIZE; each chunk commits together with the job's counters, which is
+what the progress stream (ImportJobEventsView) reads.
+
+The counters also say how far a job got. A job left running by a process
+that died is queued again after STALE_AFTER and resumes after its last
+committed chunk. Each web process starts the worker on its first request,
+so jobs queued before a restart run without waiting for a new upload; the
+run_imports command does the same from the command line.
+"""
+import csv
+import io
+import logging
+import threading
+from datetime import date, timedelta
+from itertools import islice
+from django.core.signals import request_started
+from django.db import close_old_connections, connection, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from . import dimensions
+from .models import Issue, Appearance, ImportJob
+from .signals import batched_appearance_changes
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+# Error lines kept on the job; the counters still cover every row
+MAX_LOG_LINES = 100
+# A running job not finished after this long was left behind by a dead process
+STALE_AFTER = timedelta(hours=1)
+COUNTERS = ('rows_parsed', 'rows_inserted', 'rows_skipped', 'errors')
+
+MONTHS = {
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
+}
+
+_wakeup = threading.Event()
+_lock = threading.Lock()
+_thread = None
+
+
+def parse_row(row):
+    """
+    (woman name, publishing date, edition, section name) for a CSV row, or
+    None for a row without a woman. Raises ValueError for a malformed row.
+    """
+    if not row or not row[0].strip():
+        return None
+    if len(row) < 4:
+        raise ValueError(f"expected 4 columns, got {len(row)}")
+    woman_name, month_year_str, edition_str, section_name = (value.strip() for value in row[:4])
+
+    try:
+        month_str, year_str = month_year_str.split('/')
+        month = MONTHS[month_str.lower()]
+        year = int(year_str)
+    except (KeyError, ValueError):
+        raise ValueError(f"invalid date '{month_year_str}'")
+    # Year pivot logic
+    if year < 100:
+        year += 1900 if year >= 50 else 2000
+
+    edition = None
+    if edition_str:
+        try:
+            edition = int(edition_str)
+        except ValueError:
+            pass  # Keep None
+
+    return woman_name, date(year, month, 1), edition, section_name
+
+
+def ingest(lines, progress=None, chunk_size=CHUNK_SIZE, resume=None):
+    """
+    Ingest CSV lines, header first. Every chunk of rows is one transaction;
+    progress(counts, messages) is called inside it with the running totals
+    and that chunk's error lines. resume is the counts of an earlier run:
+    the rows it parsed are skipped. Returns the final counts.
+    """
+    reader = csv.reader(lines, delimiter=';')
+    next(reader, None)  # Skip header: Mulher;Mês;Edição;Seção...
+
+    counts = dict(resume) if resume else dict.fromkeys(COUNTERS, 0)
+    reader = islice(reader, counts['rows_parsed'], None)
+    while chunk := list(islice(reader, chunk_size)):
+        messages = []
+        with transaction.atomic():
+            with batched_appearance_changes():
+                for row in chunk:
+                    counts['rows_parsed'] += 1
+                    try:
+                        parsed = parse_row(row)
+                    except ValueError as e:
+                        counts['errors'] += 1
+                        # Line 1 is the header
+                        messages.append(f"Line {counts['rows_parsed'] + 1}: {e}")
+                        continue
+                    if parsed is None:
+                        counts['rows_skipped'] += 1
+                        continue
+
+                    woman_name, publishing_date, edition, section_name = parsed
+                    issue, _ = Issue.objects.get_or_create(publishing_date=publishing_date, edition=edition)
+                    Appearance.objects.create(
+                        woman_id=dimensions.woman_id(woman_name),
+                        section_id=dimensions.section_id(section_name),
+                        issue=issue,
+                    )
+                    counts['rows_inserted'] += 1
+            if progress:
+                progress(dict(counts), messages)
+    return counts
+
+
+def run_job(job):
+    """
+    Ingest a claimed job's file, recording progress and the outcome on the
+    job. A requeued job carries on after the rows it already committed.
+    """
+    log = job.log.splitlines() if job.log else []
+
+    def progress(counts, messages):
+        log.extend(messages[:MAX_LOG_LINES - len(log)])
+        ImportJob.objects.filter(pk=job.pk).update(log='\n'.join(log), **counts)
+
+    status = ImportJob.DONE
+    try:
+        with job.file.open('rb') as f:
+            resume = {name: getattr(job, name) for name in COUNTERS}
+            ingest(io.TextIOWrapper(f, encoding='utf-8-sig', newline=''), progress, resume=resume)
+    except Exception as e:
+        logger.exception("Import job %s failed", job.pk)
+        status = ImportJob.FAILED
+        log.append(f"{type(e).__name__}: {e}")
+    ImportJob.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now(), log='\n'.join(log))
+
+
+def _stale():
+    return ImportJob.objects.filter(status=ImportJob.RUNNING, started_at__lt=timezone.now() - STALE_AFTER)
+
+
+def requeue_stale():
+    """Queue again the jobs left running by a process that died; returns how many."""
+    return _stale().update(status=ImportJob.QUEUED)
+
+
+def claim_next():
+    """Mark the oldest queued job as running and return it, or None."""
+    while True:
+        pk = ImportJob.objects.filter(status=ImportJob.QUEUED).order_by('pk').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        # Another worker process may have claimed it in the meantime
+        claimed = ImportJob.objects.filter(pk=pk, status=ImportJob.QUEUED).update(
+            status=ImportJob.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return ImportJob.objects.get(pk=pk)
+
+
+def run_pending():
+    """Run queued jobs (stale ones included) until there are none left; returns how many ran."""
+    requeue_stale()
+    ran = 0
+    while job := claim_next():
+        run_job(job)
+        ran += 1
+    return ran
+
+
+def _run():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        try:
+            run_pending()
+        except Exception:
+            logger.exception("Import worker failed")
+        finally:
+            close_old_connections()
+            connection.close()
+
+
+def schedule_imports():
+    """Wake the import thread, starting it on first use."""
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name='csv-import', daemon=True)
+            _thread.start()
+    _wakeup.set()
+
+
+def enqueue():
+    """Run the queued jobs once the transaction that created them has committed."""
+    transaction.on_commit(schedule_imports)
+
+
+@receiver(request_started, dispatch_uid='core.ingest.start_worker')
+def start_worker(**kwargs):
+    """On a process's first request, pick up the jobs queued or left running before it started."""
+    request_started.disconnect(dispatch_uid='core.ingest.start_worker')
+    if (ImportJob.objects.filter(status=ImportJob.QUEUED) | _stale()).exists():
+        schedule_imports()
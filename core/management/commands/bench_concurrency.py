@@ -0,0 +1,215 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import translation
+from core.models import Issue
+from .benchmark import percentile
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+MODES = ('wsgi', 'asgi')
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """
+    A WSGI server with a fixed number of worker threads, like a threaded
+    gunicorn worker: a request holds its thread until the response is sent.
+    """
+    request_queue_size = 1024
+
+    def __init__(self, address, threads, sndbuf):
+        self.sndbuf = sndbuf
+        super().__init__(address, QuietHandler)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def server_bind(self):
+        # Accepted connections inherit the listening socket's send buffer
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+
+def fetch(port, path, chunk=65536, delay=0.0, rcvbuf=None, receiving=None):
+    """
+    GET path over a raw socket, optionally reading like a slow client.
+    receiving is released once the first bytes arrive. Returns (status, seconds, bytes).
+    """
+    start = time.perf_counter()
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        if rcvbuf:
+            # A small receive window makes the server wait on us, like a phone on a bad network
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        sock.connect(('127.0.0.1', port))
+        sock.sendall(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+        received = bytearray()
+        while True:
+            data = sock.recv(chunk)
+            if not data:
+                break
+            if receiving and not received:
+                receiving.release()
+            received += data
+            if delay:
+                time.sleep(delay)
+    status = int(received.split(b' ', 2)[1]) if received.startswith(b'HTTP/') else 0
+    return status, time.perf_counter() - start, len(received)
+
+
+class Command(BaseCommand):
+    help = 'Compares WSGI and ASGI latency for normal readers while many slow clients download large pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi', help='Comma-separated servers to compare')
+        parser.add_argument('--path', help='Page the slow clients download (default: the largest issue page)')
+        parser.add_argument('--probe-path', help='Page timed for the normal readers (default: the issue grid)')
+        parser.add_argument('--slow-clients', type=int, default=50)
+        parser.add_argument('--slow-delay', type=float, default=0.02, help='Seconds a slow client waits between reads')
+        parser.add_argument('--slow-chunk', type=int, default=1024, help='Bytes a slow client reads at a time')
+        parser.add_argument('--settle', type=float, default=10.0,
+                            help='Longest wait for the slow clients to start receiving before timing')
+        parser.add_argument('--requests', type=int, default=100, help='Requests made by the normal readers')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent normal readers')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the WSGI server')
+        parser.add_argument('--sndbuf', type=int, default=65536,
+                            help='Server socket send buffer; keep it below the page size, or the kernel '
+                                 'absorbs the whole response and no server ever waits on a slow client')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--serve', choices=MODES, help='Internal: run one server and print its port')
+
+    def handle(self, *args, **options):
+        if options['serve']:
+            return self.serve(options['serve'], options['threads'], options['sndbuf'])
+
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        if 'asgi' in modes and uvicorn is None:
+            raise CommandError('The ASGI run needs uvicorn: pip install uvicorn')
+
+        with translation.override(settings.LANGUAGE_CODE):
+            path = options['path'] or self.default_path()
+            probe_path = options['probe_path'] or reverse('issue_list')
+
+        results = {'path': path, 'probe_path': probe_path, 'slow_clients': options['slow_clients'], 'modes': {}}
+        for mode in modes:
+            results['modes'][mode] = self.run(mode, path, probe_path, options)
+
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def default_path(self):
+        issue = Issue.objects.annotate(n=Count('appearance')).order_by('-n').first()
+        if not issue:
+            raise CommandError('The catalogue is empty. Run "generate_catalogue" first.')
+        return reverse('issue_detail', kwargs={'pk': issue.pk})
+
+    def serve(self, mode, threads, sndbuf):
+        if mode == 'wsgi':
+            from django.core.wsgi import get_wsgi_application
+
+            server = PooledWSGIServer(('127.0.0.1', 0), threads, sndbuf)
+            server.set_app(get_wsgi_application())
+            self.stdout.write(f'READY {server.server_address[1]}')
+            self.stdout.flush()
+            server.serve_forever()
+        else:
+            from django.core.asgi import get_asgi_application
+
+            sock = socket.create_server(('127.0.0.1', 0), backlog=1024)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+            server = uvicorn.Server(uvicorn.Config(get_asgi_application(), lifespan='off', log_level='warning'))
+            self.stdout.write(f'READY {sock.getsockname()[1]}')
+            self.stdout.flush()
+            server.run(sockets=[sock])
+
+    def run(self, mode, path, probe_path, options):
+        # Each server runs in its own process so the URLconf picks the matching views
+        env = {**os.environ, 'DJANGO_ASYNC_READ_VIEWS': '1' if mode == 'asgi' else '0'}
+        command = [
+            sys.executable, '-m', 'django', 'bench_concurrency', '--serve', mode,
+            '--threads', str(options['threads']), '--sndbuf', str(options['sndbuf']),
+            '--settings', settings.SETTINGS_MODULE,
+        ]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE, text=True)
+        try:
+            line = server.stdout.readline()
+            if not line.startswith('READY '):
+                raise CommandError(f'The {mode} server did not start')
+            port = int(line.split()[1])
+            fetch(port, probe_path)  # warm up
+
+            slow = []
+            receiving = threading.Semaphore(0)
+            threads = [
+                threading.Thread(target=lambda: slow.append(fetch(
+                    port, path, chunk=options['slow_chunk'], delay=options['slow_delay'], rcvbuf=4096,
+                    receiving=receiving,
+                )))
+                for _ in range(options['slow_clients'])
+            ]
+            for thread in threads:
+                thread.start()
+            # Time the normal readers once the slow clients are trickling their downloads,
+            # or once the ones a thread pool can take are (the rest are queued by then)
+            deadline = time.monotonic() + options['settle']
+            for _ in threads:
+                if not receiving.acquire(timeout=max(0, deadline - time.monotonic())):
+                    break
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                probes = list(pool.map(lambda _: fetch(port, probe_path), range(options['requests'])))
+            elapsed = time.perf_counter() - start
+
+            for thread in threads:
+                thread.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+        latencies = [seconds * 1000 for _, seconds, _ in probes]
+        return {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'max_ms': round(max(latencies), 2),
+            'requests_per_s': round(len(probes) / elapsed, 1),
+            'errors': sum(1 for status, _, _ in probes + slow if status != 200),
+            'slow_avg_s': round(sum(seconds for _, seconds, _ in slow) / max(1, len(slow)), 2),
+            'page_bytes': probes[0][2] if probes else 0,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{results['slow_clients']} slow clients on {results['path']}, timing {results['probe_path']}"
+        )
+        self.stdout.write(f'{"server":<8} {"p50 ms":>10} {"p95 ms":>10} {"max ms":>10} {"req/s":>8} {"errors":>7} {"slow avg s":>11}')
+        for mode, r in results['modes'].items():
+            self.stdout.write(
+                f"{mode:<8} {r['p50_ms']:>10} {r['p95_ms']:>10} {r['max_ms']:>10} "
+                f"{r['requests_per_s']:>8} {r['errors']:>7} {r['slow_avg_s']:>11}"
+            )
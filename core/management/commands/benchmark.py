@@ -0,0 +1,253 @@
+import csv
+import io
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import translation
+from core import urls as core_urls
+from core.models import Woman, Issue, Appearance, ImportJob
+
+MONTHS = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']
+
+
+class Rollback(Exception):
+    """Raised to undo the writes made while benchmarking an import path."""
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks every core URL and import path, optionally comparing against a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per URL')
+        parser.add_argument('--ingest-rows', type=int, default=2000, help='Rows in the synthetic import file')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--language', default='en', help='Language prefix used for the URLs')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare the results with a previous JSON run')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Allowed p95 slowdown against the baseline, in percent')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when the baseline comparison finds a regression')
+
+    def handle(self, *args, **options):
+        self.samples = self.find_samples()
+
+        setup_test_environment()
+        try:
+            with translation.override(options['language']):
+                results = {
+                    'meta': self.meta(options),
+                    'urls': self.bench_urls(options['iterations']),
+                    'ingest': self.bench_ingest(options),
+                }
+        finally:
+            teardown_test_environment()
+
+        self.report(results)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+        if options['baseline']:
+            regressions = self.compare(results, options['baseline'], options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+
+    def meta(self, options):
+        return {
+            'seed': options['seed'],
+            'iterations': options['iterations'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'women': Woman.objects.count(),
+            'issues': Issue.objects.count(),
+            'appearances': Appearance.objects.count(),
+        }
+
+    def find_samples(self):
+        """The primary keys filled into the URL patterns, keyed by converter name or by URL prefix for pk."""
+        woman = Woman.objects.order_by('pk').first()
+        appearance = Appearance.objects.select_related('issue', 'section').order_by('pk').first()
+        if not woman or not appearance:
+            raise CommandError('The catalogue is empty. Run "generate_catalogue" first.')
+
+        return {
+            'woman': woman.pk,
+            'issue': appearance.issue.pk,
+            'appearance': appearance.pk,
+            'issue_pk': appearance.issue.pk,
+            'section_pk': appearance.section.pk,
+            # A finished job, so its event stream ends at once ("import/<int:pk>/..."); the routes are skipped without one
+            'import': ImportJob.objects.filter(status__in=[ImportJob.DONE, ImportJob.FAILED])
+            .order_by('-pk').values_list('pk', flat=True).first(),
+        }
+
+    def url_kwargs(self, pattern):
+        """Sample kwargs for a URL pattern, or None when one of its converters has no sample."""
+        kwargs = {}
+        for key in pattern.pattern.converters:
+            # "woman/<int:pk>/...", "issue/<int:pk>/...", "appearance/<int:pk>/..."
+            sample = str(pattern.pattern).split('/')[0] if key == 'pk' else key
+            if self.samples.get(sample) is None:
+                return None
+            kwargs[key] = self.samples[sample]
+        return kwargs
+
+    def url_cases(self):
+        """Yield (label, url) for every named pattern in core.urls, plus the interesting query strings."""
+        for pattern in core_urls.urlpatterns:
+            name = pattern.name
+            kwargs = self.url_kwargs(pattern)
+            if kwargs is None:
+                self.stdout.write(f'Skipping {name}: no sample for {", ".join(pattern.pattern.converters)}')
+                continue
+            yield name, reverse(name, kwargs=kwargs)
+
+        first_year = Issue.objects.order_by('publishing_date').values_list('publishing_date', flat=True).first()
+        if first_year:
+            yield 'issue_list?year', f"{reverse('issue_list')}?year={first_year.year}"
+        yield 'woman_list?q', f"{reverse('woman_list')}?q=a"
+
+    def bench_urls(self, iterations):
+        client = Client()
+        results = {}
+        for label, url in self.url_cases():
+            timings = []
+            queries = 0
+            status = None
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries = len(ctx.captured_queries)
+                status = response.status_code
+            results[label] = {
+                'url': url,
+                'status': status,
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'queries': queries,
+            }
+        return results
+
+    def synthetic_rows(self, seed, total):
+        rng = random.Random(seed)
+        for i in range(total):
+            year = rng.randint(1975, 2015) % 100
+            yield [
+                f'Benchmark Woman {i % (total // 3 + 1)}',
+                f'{rng.choice(MONTHS)}/{year:02d}',
+                str(rng.randint(1, 500)),
+                rng.choice(['Capa', 'Ensaio', 'Entrevista', 'Especial']),
+            ]
+
+    def bench_ingest(self, options):
+        total = options['ingest_rows']
+        rows = list(self.synthetic_rows(options['seed'], total))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'benchmark.csv')
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(['Mulher', 'Mês', 'Edição', 'Seção'])
+                writer.writerows(rows)
+
+            paste = '\n'.join(f'{month}; {edition}; {section}' for _, month, edition, section in rows)
+            bulk_url = reverse('woman_appearance_bulk_add', kwargs={'pk': self.samples['woman']})
+            client = Client()
+
+            cases = {
+                'ingest_csv': lambda: call_command('ingest_csv', path, stdout=io.StringIO()),
+                'import_data': lambda: call_command('import_data', path, stdout=io.StringIO()),
+                'woman_appearance_bulk_add': lambda: client.post(bulk_url, {'content': paste}),
+            }
+
+            results = {}
+            for label, run in cases.items():
+                results[label] = self.timed_rollback(run, total)
+        return results
+
+    def timed_rollback(self, run, total):
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as ctx:
+                    run()
+                elapsed = time.perf_counter() - start
+                raise Rollback
+        except Rollback:
+            pass
+        return {
+            'rows': total,
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(total / elapsed, 1) if elapsed else None,
+            'queries': len(ctx.captured_queries),
+        }
+
+    def report(self, results):
+        self.stdout.write(f'{"URL":<32} {"status":>6} {"p50 ms":>10} {"p95 ms":>10} {"queries":>8}')
+        for label, data in results['urls'].items():
+            self.stdout.write(
+                f'{label:<32} {data["status"]:>6} {data["p50_ms"]:>10.2f} {data["p95_ms"]:>10.2f} {data["queries"]:>8}'
+            )
+        self.stdout.write('')
+        self.stdout.write(f'{"Import path":<32} {"rows":>6} {"seconds":>10} {"rows/s":>10} {"queries":>8}')
+        for label, data in results['ingest'].items():
+            # None when the run was too fast to time
+            rate = f'{data["rows_per_sec"]:.1f}' if data['rows_per_sec'] else '-'
+            self.stdout.write(
+                f'{label:<32} {data["rows"]:>6} {data["seconds"]:>10.3f} {rate:>10} {data["queries"]:>8}'
+            )
+
+    def compare(self, results, baseline_path, threshold):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = []
+        self.stdout.write('')
+        self.stdout.write(f'Comparison with {baseline_path} (threshold {threshold:.0f}%)')
+        for label, data in results['urls'].items():
+            old = baseline.get('urls', {}).get(label)
+            if not old:
+                continue
+            delta = (data['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+            slower = delta > threshold
+            more_queries = data['queries'] > old['queries']
+            line = f'{label:<32} p95 {delta:+7.1f}%  queries {old["queries"]} -> {data["queries"]}'
+            if slower or more_queries:
+                regressions.append(label)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        for label, data in results['ingest'].items():
+            old = baseline.get('ingest', {}).get(label)
+            if not old or not old.get('rows_per_sec') or not data['rows_per_sec']:
+                continue
+            delta = (data['rows_per_sec'] - old['rows_per_sec']) / old['rows_per_sec'] * 100
+            line = f'{label:<32} rows/s {delta:+7.1f}%'
+            if -delta > threshold:
+                regressions.append(label)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+        return regressions
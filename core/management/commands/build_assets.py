@@ -0,0 +1,84 @@
+import gzip
+import os
+from pathlib import Path
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from core.assets import BUNDLES, COMPRESSIBLE_EXTENSIONS, MINIFIERS, rjsmin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = 'Bundles and minifies the core CSS/JS, runs collectstatic and writes precompressed .gz/.br files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-collect', action='store_true', help='Only build the bundles')
+        parser.add_argument('--min-size', type=int, default=256, help='Do not compress files smaller than this')
+
+    def handle(self, *args, **options):
+        build_dir = Path(settings.ASSET_BUILD_DIR)
+
+        for kind, (bundle, sources) in BUNDLES.items():
+            parts = []
+            for source in sources:
+                path = finders.find(source)
+                if not path:
+                    raise CommandError(f'Static file "{source}" not found')
+                parts.append(Path(path).read_text(encoding='utf-8'))
+
+            separator = '\n' if kind == 'css' else ';\n'
+            content = MINIFIERS[kind](separator.join(parts))
+            target = build_dir / bundle
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(content, encoding='utf-8')
+
+            original = sum(len(p.encode('utf-8')) for p in parts)
+            self.stdout.write(f'{bundle}: {len(sources)} files, {original} -> {len(content.encode("utf-8"))} bytes')
+
+        if rjsmin is None:
+            self.stdout.write(self.style.WARNING('rjsmin is not installed: the JS bundle is not minified'))
+
+        if options['no_collect']:
+            return
+
+        if str(build_dir) not in [str(d) for d in settings.STATICFILES_DIRS]:
+            # settings only lists the build directory once it exists
+            settings.STATICFILES_DIRS = list(settings.STATICFILES_DIRS) + [build_dir]
+            finders.get_finder.cache_clear()
+
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        compressed = self.compress(Path(settings.STATIC_ROOT), options['min_size'])
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed: only .gz files were written'))
+        self.stdout.write(self.style.SUCCESS(f'Collected into {settings.STATIC_ROOT}, {compressed} files precompressed'))
+
+    def compress(self, root, min_size):
+        count = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                if path.suffix not in COMPRESSIBLE_EXTENSIONS or path.stat().st_size < min_size:
+                    continue
+
+                data = None
+                mtime = path.stat().st_mtime
+                targets = [(path.with_name(filename + '.gz'), lambda d: gzip.compress(d, 9, mtime=0))]
+                if brotli is not None:
+                    targets.append((path.with_name(filename + '.br'), lambda d: brotli.compress(d, quality=11)))
+
+                for target, compress in targets:
+                    if target.exists() and target.stat().st_mtime >= mtime:
+                        continue
+                    if data is None:
+                        data = path.read_bytes()
+                    packed = compress(data)
+                    if len(packed) < len(data):
+                        target.write_bytes(packed)
+                        count += 1
+        return count
@@ -0,0 +1,27 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from core import changes
+
+
+class Command(BaseCommand):
+    help = 'Writes the catalogue changes after a cursor to stdout as JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=int, default=0, help='Cursor of the last change already applied')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many changes')
+        parser.add_argument('--follow', action='store_true', help='Keep polling for new changes')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls with --follow')
+
+    def handle(self, *args, **options):
+        since, limit = options['since'], options['limit']
+        while True:
+            for change in changes.feed(since, limit):
+                self.stdout.write(json.dumps(change, default=str))
+                since = change['cursor']
+                if limit:
+                    limit -= 1
+            if not options['follow'] or limit == 0:
+                return
+            self.stdout.flush()
+            time.sleep(options['interval'])
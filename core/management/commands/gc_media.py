@@ -0,0 +1,208 @@
+import heapq
+import os
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from core.models import IssueCover
+
+# Names held in memory while scanning: each full run is sorted and spilled to a temporary file
+RUN_SIZE = 100_000
+SCAN_BATCH = 1000
+BATCH_SIZE = 500
+
+
+def _scan_dir(path, min_age, results):
+    """List one directory into results: (path, size) batches of old enough files, and its subdirectories."""
+    batch = []
+    recent = 0
+    newest = time.time() - min_age
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    results.put(('dir', entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    # Files this recent may belong to an upload whose row is not committed yet
+                    if stat.st_mtime > newest:
+                        recent += 1
+                        continue
+                    batch.append((entry.path, stat.st_size))
+                    if len(batch) >= SCAN_BATCH:
+                        results.put(('files', batch))
+                        batch = []
+    except OSError as e:
+        results.put(('error', f'{path}: {e}'))
+    finally:
+        results.put(('files', batch))
+        results.put(('done', recent))
+
+
+def scan(root, workers, min_age, stats):
+    """
+    Yield (path, size) for every file under root older than min_age seconds.
+    Directories are listed in parallel threads; the files of one directory
+    are handed over in batches as they are read, so none is held whole.
+    """
+    results = queue.Queue(maxsize=workers * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pool.submit(_scan_dir, root, min_age, results)
+        pending = 1
+        while pending:
+            kind, value = results.get()
+            if kind == 'files':
+                yield from value
+            elif kind == 'dir':
+                pending += 1
+                pool.submit(_scan_dir, value, min_age, results)
+            elif kind == 'done':
+                pending -= 1
+                stats['recent'] += value
+            else:
+                stats['errors'].append(value)
+
+
+def _spill(run):
+    run.sort()
+    f = tempfile.TemporaryFile('w+', encoding='utf-8', errors='surrogateescape')
+    f.writelines(f'{name}\t{size}\n' for name, size in run)
+    f.seek(0)
+    return f
+
+
+def _read_run(f):
+    for line in f:
+        name, size = line.rstrip('\n').rsplit('\t', 1)
+        yield name, int(size)
+
+
+def sorted_files(files):
+    """The (name, size) pairs of files in name order, by an external merge sort over temporary files."""
+    runs = []
+    while run := list(islice(files, RUN_SIZE)):
+        runs.append(_spill(run))
+    try:
+        yield from heapq.merge(*(_read_run(f) for f in runs))
+    finally:
+        for f in runs:
+            f.close()
+
+
+def referenced_names():
+    """Every image and thumbnail name IssueCover rows point at, in name order, streamed from the primary."""
+    covers = IssueCover.objects.using(DEFAULT_DB_ALIAS)
+    columns = [
+        covers.exclude(**{field: ''}).order_by(field).values_list(field, flat=True).iterator(chunk_size=BATCH_SIZE)
+        for field in ('image', 'thumbnail')
+    ]
+    return heapq.merge(*columns)
+
+
+def _encodable(name):
+    try:
+        name.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def orphans(files, referenced):
+    """Merge-join two name-ordered streams: the (name, size) files whose name is not referenced."""
+    referenced = iter(referenced)
+    current = next(referenced, None)
+    for name, size in files:
+        while current is not None and current < name:
+            following = next(referenced, None)
+            if following is not None and following < current:
+                raise CommandError('The database does not sort file names like Python does; cannot merge')
+            current = following
+        if current != name:
+            yield name, size
+
+
+class Command(BaseCommand):
+    help = 'Finds cover files no IssueCover row refers to, and removes or quarantines them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default='covers', help='Storage directory to scan')
+        parser.add_argument('--workers', type=int, default=8, help='Directory scanning threads')
+        parser.add_argument(
+            '--min-age', type=float, default=3600,
+            help='Skip files modified in the last this many seconds (uploads still in progress)',
+        )
+        parser.add_argument('--quarantine', help='Move orphans under this directory instead of deleting them')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the orphans')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        media_root = default_storage.location
+        root = os.path.join(media_root, options['directory'])
+        if not os.path.isdir(root):
+            raise CommandError(f'{root} is not a directory')
+        quarantine = options['quarantine'] and os.path.abspath(options['quarantine'])
+        if quarantine and os.path.commonpath([quarantine, os.path.abspath(root)]) == os.path.abspath(root):
+            raise CommandError('The quarantine directory must be outside the scanned one')
+
+        stats = {'recent': 0, 'errors': []}
+        scanned = 0
+
+        def storage_names():
+            nonlocal scanned
+            for path, size in scan(root, max(1, options['workers']), options['min_age'], stats):
+                scanned += 1
+                if '\n' in path:
+                    stats['errors'].append(f'{path!r}: newline in the file name')
+                    continue
+                yield os.path.relpath(path, media_root).replace(os.sep, '/'), size
+
+        removed = removed_bytes = 0
+        batch = []
+        for orphan in orphans(sorted_files(storage_names()), referenced_names()):
+            batch.append(orphan)
+            if len(batch) >= BATCH_SIZE:
+                removed, removed_bytes = self.collect(batch, options['dry_run'], quarantine, removed, removed_bytes)
+                batch = []
+        if batch:
+            removed, removed_bytes = self.collect(batch, options['dry_run'], quarantine, removed, removed_bytes)
+
+        for error in stats['errors']:
+            self.stdout.write(self.style.WARNING(f'Could not scan {error}'))
+        verb = 'Would remove' if options['dry_run'] else 'Quarantined' if quarantine else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {removed} orphaned files ({removed_bytes / 2 ** 20:.1f} MB) of {scanned} scanned, '
+            f'{stats["recent"]} too recent to judge, in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def collect(self, batch, dry_run, quarantine, removed, removed_bytes):
+        """Remove or quarantine a batch of orphans; returns the updated totals."""
+        names = {name for name, _ in batch}
+        # Rows added since the database was read keep their files (undecodable names cannot be in it)
+        stored = {name for name in names if _encodable(name)}
+        covers = IssueCover.objects.using(DEFAULT_DB_ALIAS)
+        names -= set(covers.filter(image__in=stored).values_list('image', flat=True))
+        names -= set(covers.filter(thumbnail__in=stored).values_list('thumbnail', flat=True))
+        for name, size in batch:
+            if name not in names:
+                continue
+            if dry_run:
+                self.stdout.write(name)
+            else:
+                try:
+                    if quarantine:
+                        target = os.path.join(quarantine, name)
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        shutil.move(default_storage.path(name), target)
+                    else:
+                        default_storage.delete(name)
+                except OSError as e:
+                    self.stdout.write(self.style.WARNING(f'{name}: {e}'))
+                    continue
+            removed += 1
+            removed_bytes += size
+        return removed, removed_bytes
@@ -0,0 +1,167 @@
+import io
+import random
+from datetime import date
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from core import changes, coappearances, stats
+from core.models import Woman, Section, Issue, Appearance, Change, IssueCover, section_key
+from core.signals import batched_appearance_changes
+
+FIRST_NAMES = [
+    'Ana', 'Beatriz', 'Carla', 'Daniela', 'Eduarda', 'Fernanda', 'Gabriela', 'Helena',
+    'Isabela', 'Juliana', 'Karina', 'Larissa', 'Mariana', 'Natália', 'Olívia', 'Patrícia',
+    'Renata', 'Sabrina', 'Tatiana', 'Vanessa', 'Yasmin', 'Zélia', 'Luana', 'Priscila',
+]
+
+LAST_NAMES = [
+    'Alves', 'Barbosa', 'Cardoso', 'Dias', 'Esteves', 'Ferreira', 'Gomes', 'Hoffmann',
+    'Lima', 'Martins', 'Nogueira', 'Oliveira', 'Pereira', 'Queiroz', 'Ribeiro', 'Santos',
+    'Teixeira', 'Vieira', 'Xavier', 'Zanetti', 'Araújo', 'Conceição', 'Magalhães', 'Souza',
+]
+
+SECTION_NAMES = [
+    'Capa', 'Entrevista', 'Ensaio', 'Garota da Capa', 'Coelhinha do Mês', 'Especial',
+    'Making Of', 'Reportagem', 'Moda', 'Ensaio Extra',
+]
+
+COVER_COLOURS = [(220, 38, 38), (37, 99, 235), (22, 163, 74), (234, 179, 8), (147, 51, 234)]
+
+
+class Command(BaseCommand):
+    help = 'Generates a seeded synthetic catalogue for load tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same catalogue)')
+        parser.add_argument('--women', type=int, default=5000)
+        parser.add_argument('--issues', type=int, default=600)
+        parser.add_argument('--sections', type=int, default=25)
+        parser.add_argument('--min-appearances', type=int, default=3, help='Minimum appearances per issue')
+        parser.add_argument('--max-appearances', type=int, default=12, help='Maximum appearances per issue')
+        parser.add_argument('--special-issues', type=int, default=5,
+                            help='Number of oversized "special" issues with thousands of appearances')
+        parser.add_argument('--special-size', type=int, default=2000)
+        parser.add_argument('--covers', type=int, default=1, help='Dummy cover images per issue (0 to skip)')
+        parser.add_argument('--start-year', type=int, default=1975)
+        parser.add_argument('--clear', action='store_true', help='Delete the existing catalogue first')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        if options['women'] < 1 or options['issues'] < 1 or options['sections'] < 1:
+            raise CommandError('--women, --issues and --sections must be at least 1')
+
+        if options['clear']:
+            self.clear()
+        elif Woman.objects.exists() or Issue.objects.exists():
+            raise CommandError('The catalogue is not empty. Use --clear to replace it.')
+
+        with transaction.atomic():
+            women = self.create_women(rng, options['women'], batch_size)
+            sections = self.create_sections(options['sections'], batch_size)
+            issues = self.create_issues(options['issues'], options['start_year'], batch_size)
+            count = self.create_appearances(rng, women, sections, issues, options, batch_size)
+            # bulk_create bypasses the signals that maintain the derived tables and the change log
+            coappearances.rebuild()
+            stats.rebuild()
+            self.record_inserts(Woman, Section, Issue, Appearance)
+
+        covers = 0
+        if options['covers'] > 0:
+            covers = self.create_covers(rng, issues, options['covers'], batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(women)} women, {len(sections)} sections, {len(issues)} issues, '
+            f'{count} appearances and {covers} covers (seed {options["seed"]})'
+        ))
+
+    def clear(self):
+        for cover in IssueCover.objects.values_list('image', flat=True).iterator():
+            if cover:
+                default_storage.delete(cover)
+        with transaction.atomic(), batched_appearance_changes():
+            Appearance.objects.all().delete()
+            IssueCover.objects.all().delete()
+            Issue.objects.all().delete()
+            Section.objects.all().delete()
+            Woman.objects.all().delete()
+
+    def create_women(self, rng, total, batch_size):
+        names = set()
+        result = []
+        while len(result) < total:
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            if name in names:
+                # Keep names unique the same way real homonyms are told apart
+                name = f'{name} {len(result)}'
+            names.add(name)
+            result.append(Woman(name=name))
+        Woman.objects.bulk_create(result, batch_size=batch_size)
+        return list(Woman.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_sections(self, total, batch_size):
+        names = SECTION_NAMES[:total]
+        names += [f'Seção {i}' for i in range(len(names) + 1, total + 1)]
+        Section.objects.bulk_create([Section(name=name, key=section_key(name)) for name in names], batch_size=batch_size)
+        return list(Section.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_issues(self, total, start_year, batch_size):
+        issues = []
+        for i in range(total):
+            year, month = divmod(i, 12)
+            issues.append(Issue(publishing_date=date(start_year + year, month + 1, 1), edition=i + 1))
+        Issue.objects.bulk_create(issues, batch_size=batch_size)
+        return list(Issue.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_appearances(self, rng, women, sections, issues, options, batch_size):
+        special = set(rng.sample(issues, min(options['special_issues'], len(issues))))
+        # A small pool of recurring sections carries most appearances, like the real data
+        weights = [1.0 / (rank + 1) for rank in range(len(sections))]
+
+        batch = []
+        count = 0
+        for issue_id in issues:
+            if issue_id in special:
+                size = options['special_size']
+            else:
+                size = rng.randint(options['min_appearances'], max(options['min_appearances'], options['max_appearances']))
+            for woman_id in rng.sample(women, min(size, len(women))):
+                section_id = rng.choices(sections, weights=weights)[0]
+                batch.append(Appearance(woman_id=woman_id, section_id=section_id, issue_id=issue_id))
+            if len(batch) >= batch_size:
+                Appearance.objects.bulk_create(batch, batch_size=batch_size)
+                count += len(batch)
+                batch = []
+        if batch:
+            Appearance.objects.bulk_create(batch, batch_size=batch_size)
+            count += len(batch)
+        return count
+
+    def create_covers(self, rng, issues, per_issue, batch_size):
+        from PIL import Image
+
+        # A handful of tiny JPEGs are enough; each cover gets its own file on disk
+        images = []
+        for colour in COVER_COLOURS:
+            buffer = io.BytesIO()
+            Image.new('RGB', (60, 80), colour).save(buffer, format='JPEG')
+            images.append(buffer.getvalue())
+
+        covers = []
+        for issue_id in issues:
+            for n in range(per_issue):
+                name = default_storage.save(f'covers/synthetic_{issue_id}_{n}.jpg', ContentFile(rng.choice(images)))
+                covers.append(IssueCover(issue_id=issue_id, image=name))
+        with transaction.atomic():
+            IssueCover.objects.bulk_create(covers, batch_size=batch_size)
+            self.record_inserts(IssueCover)
+        return len(covers)
+
+    def record_inserts(self, *models):
+        """Log every row of models as inserted: the catalogue was empty, so they are all new."""
+        with connection.cursor() as cursor:
+            for model in models:
+                changes.record_where(cursor, model, '1 = 1', [], Change.INSERT)
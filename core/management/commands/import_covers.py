@@ -0,0 +1,178 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from core import changes, images, stats
+from core.models import Change, Issue, IssueCover
+
+# 1990-01.jpg, 1990-01_ed1.jpg, 1990-01_ed1_b.jpg (alternate covers)
+FILENAME = re.compile(r'^(?P<year>\d{4})-(?P<month>\d{2})(?:_ed(?P<edition>\d+))?(?:[_-].*)?$')
+EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+BATCH_SIZE = 500
+
+_known_hashes = frozenset()
+
+
+def _init_worker(known_hashes):
+    global _known_hashes
+    _known_hashes = known_hashes
+
+
+def _process(path):
+    try:
+        return images.process_cover(path, _known_hashes)
+    except OSError as e:
+        return {'path': path, 'bytes': 0, 'error': str(e)}
+
+
+def issue_key(filename):
+    """(publishing_date, edition) encoded in a cover's file name, or None."""
+    match = FILENAME.match(os.path.splitext(filename)[0])
+    if not match:
+        return None
+    try:
+        publishing_date = date(int(match['year']), int(match['month']), 1)
+    except ValueError:
+        return None
+    return publishing_date, int(match['edition']) if match['edition'] else None
+
+
+class Command(BaseCommand):
+    help = 'Imports cover scans named like 1990-01_ed1.jpg from a directory, in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory searched recursively for cover images')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Image processing processes')
+        parser.add_argument('--create-issues', action='store_true',
+                            help='Create the issues named by files that match none (default: skip those files)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how the files map to issues')
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['directory']):
+            raise CommandError(f'"{options["directory"]}" is not a directory')
+        start = time.perf_counter()
+
+        files, unnamed = self.scan(options['directory'])
+        issues = self.match_issues({key for key in files.values()}, options['create_issues'] and not options['dry_run'])
+        todo = {path: issues[key] for path, key in files.items() if key in issues}
+        unmatched = len(files) - len(todo)
+        self.stdout.write(
+            f'{len(files) + unnamed} files: {len(todo)} matched to issues, {unmatched} without an issue, '
+            f'{unnamed} with an unrecognised name'
+        )
+        if options['dry_run'] or not todo:
+            return
+
+        known_hashes = self.known_hashes(options['workers'])
+        imported, duplicates, invalid, total_bytes, stored = self.import_files(todo, known_hashes, options['workers'])
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} covers ({stored / 2 ** 20:.1f} MB after the ingest policy), skipped {duplicates} '
+            f'already imported and {invalid} invalid in {elapsed:.1f}s '
+            f'({len(todo) / elapsed:.1f} files/s, {total_bytes / elapsed / 2 ** 20:.1f} MB/s)'
+        ))
+
+    def scan(self, directory):
+        """{path: (publishing_date, edition)} for the image files, and how many names did not parse."""
+        files, unnamed = {}, 0
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() not in EXTENSIONS:
+                    continue
+                key = issue_key(name)
+                if key is None:
+                    unnamed += 1
+                    self.stdout.write(self.style.WARNING(f'Unrecognised name: {os.path.join(root, name)}'))
+                else:
+                    files[os.path.join(root, name)] = key
+        return files, unnamed
+
+    def match_issues(self, keys, create):
+        """{(publishing_date, edition): issue pk} with one query over the files' date range."""
+        if not keys:
+            return {}
+        dates = [publishing_date for publishing_date, _ in keys]
+        issues = {
+            (publishing_date, edition): pk
+            for pk, publishing_date, edition in Issue.objects.filter(
+                publishing_date__range=(min(dates), max(dates))
+            ).values_list('pk', 'publishing_date', 'edition')
+        }
+        missing = keys - issues.keys()
+        if missing and create:
+            with transaction.atomic():
+                created = Issue.objects.bulk_create(
+                    [Issue(publishing_date=d, edition=e) for d, e in sorted(missing, key=lambda k: (k[0], k[1] or 0))],
+                    batch_size=BATCH_SIZE,
+                )
+                # bulk_create sends no post_save: update the yearly issue counts and the change log ourselves
+                stats.refresh_years(d.year for d, _ in missing)
+                changes.record(Issue, [issue.pk for issue in created], Change.INSERT)
+            self.stdout.write(f'Created {len(missing)} issues')
+            return self.match_issues(keys, create=False)
+        return issues
+
+    def known_hashes(self, workers):
+        """Hashes of the existing covers, computing those that predate content_hash."""
+        unhashed = dict(IssueCover.objects.filter(content_hash='').exclude(image='').values_list('image', 'pk'))
+        if unhashed:
+            self.stdout.write(f'Hashing {len(unhashed)} existing covers...')
+            updates = []
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+                for name, digest in pool.map(images.hash_stored, unhashed, chunksize=32):
+                    if digest:
+                        updates.append(IssueCover(pk=unhashed[name], content_hash=digest))
+            with transaction.atomic():
+                IssueCover.objects.bulk_update(updates, ['content_hash'], batch_size=BATCH_SIZE)
+                changes.record(IssueCover, [cover.pk for cover in updates], Change.UPDATE)
+        return frozenset(IssueCover.objects.exclude(content_hash='').values_list('content_hash', flat=True))
+
+    def import_files(self, todo, known_hashes, workers):
+        imported = duplicates = invalid = total_bytes = stored = 0
+        seen = set(known_hashes)
+        pending = []
+
+        # Worker processes only touch files; the rows are inserted here in batches
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker,
+                                 initargs=(known_hashes,)) as pool:
+            futures = [pool.submit(_process, path) for path in todo]
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                total_bytes += result['bytes']
+                if 'error' in result:
+                    invalid += 1
+                    self.stdout.write(self.style.WARNING(f'{result["path"]}: {result["error"]}'))
+                elif result.get('duplicate') or result['hash'] in seen:
+                    duplicates += 1
+                    # Same content twice in this run: drop the second copy's files
+                    for name in (result.get('image'), result.get('thumbnail')):
+                        if name:
+                            default_storage.delete(name)
+                else:
+                    seen.add(result['hash'])
+                    stored += result['stored']
+                    pending.append(IssueCover(
+                        issue_id=todo[result['path']], image=result['image'],
+                        thumbnail=result['thumbnail'], content_hash=result['hash'],
+                    ))
+                if len(pending) >= BATCH_SIZE:
+                    imported += self.insert_covers(pending)
+                    pending = []
+                if done % 1000 == 0:
+                    self.stdout.write(f'{done}/{len(todo)} files processed')
+        if pending:
+            imported += self.insert_covers(pending)
+        return imported, duplicates, invalid, total_bytes, stored
+
+    def insert_covers(self, covers):
+        with transaction.atomic():
+            created = IssueCover.objects.bulk_create(covers)
+            changes.record(IssueCover, [cover.pk for cover in created], Change.INSERT)
+        return len(created)
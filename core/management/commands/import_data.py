@@ -3,13 +3,19 @@ import os
 from datetime import datetime
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from core.models import Woman, Section, Issue, Appearance
+from core import dimensions
+from core.models import Issue, Appearance
+from core.signals import batched_appearance_changes
 
 class Command(BaseCommand):
     help = 'Imports data from CSV file'
 
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', nargs='?', default='As garotas da Playboy(Planilha1).csv',
+                            help='Path to the CSV file (defaults to the original spreadsheet export)')
+
     def handle(self, *args, **options):
-        csv_file_path = os.path.join('As garotas da Playboy(Planilha1).csv')
+        csv_file_path = os.path.join(options['csv_file'])
         
         # Mapping for month abbreviations
         month_map = {
@@ -22,7 +28,7 @@ class Command(BaseCommand):
             
             created_appearances = 0
             
-            with transaction.atomic():
+            with transaction.atomic(), batched_appearance_changes():
                 for row in reader:
                     woman_name = row['Mulher'].strip()
                     month_year = row['Mês'].strip()
@@ -50,8 +56,6 @@ class Command(BaseCommand):
                     edition = int(edition_str) if edition_str and edition_str.isdigit() else None
 
                     # Get or Create Related Models
-                    woman, _ = Woman.objects.get_or_create(name=woman_name)
-                    section_obj, _ = Section.objects.get_or_create(name=section_name)
                     issue, _ = Issue.objects.get_or_create(
                         publishing_date=publishing_date,
                         edition=edition
@@ -59,8 +63,8 @@ class Command(BaseCommand):
                     
                     # Create Appearance
                     Appearance.objects.create(
-                        woman=woman,
-                        section=section_obj,
+                        woman_id=dimensions.woman_id(woman_name),
+                        section_id=dimensions.section_id(section_name),
                         issue=issue
                     )
                     created_appearances += 1
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Section
+
+
+class Command(BaseCommand):
+    help = 'Merges sections into a canonical one, keeping their names as aliases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', help='Name of the section to keep')
+        parser.add_argument('sources', nargs='+', help='Names of the sections to merge into it')
+
+    def handle(self, *args, **options):
+        try:
+            target = Section.objects.get(name=options['target'])
+        except Section.DoesNotExist:
+            raise CommandError(f"Section '{options['target']}' does not exist")
+
+        sources = list(Section.objects.filter(name__in=options['sources']).exclude(pk=target.pk))
+        missing = set(options['sources']) - {s.name for s in sources} - {target.name}
+        if missing:
+            raise CommandError(f"Unknown sections: {', '.join(sorted(missing))}")
+
+        if not sources:
+            raise CommandError('Nothing to merge')
+
+        moved = Section.objects.merge(target, sources)
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {len(sources)} sections into '{target.name}' ({moved} appearances moved)"
+        ))
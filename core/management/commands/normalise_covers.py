@@ -0,0 +1,91 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from core import changes, images, sweeper
+from core.models import Change, IssueCover
+
+BATCH_SIZE = 200
+
+
+def _check(name):
+    """Whether a stored cover breaks the ingest policy (None when it cannot be read)."""
+    try:
+        with default_storage.open(name) as f:
+            return name, images.needs_reencoding(images.open_image(f, min_side=0)), f.size
+    except (OSError, ValueError):
+        return name, None, 0
+
+
+class Command(BaseCommand):
+    help = 'Applies the cover ingest policy (size, format, metadata) to the covers already stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Image processing processes')
+        parser.add_argument('--dry-run', action='store_true', help='Only report which covers break the policy')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        covers = dict(IssueCover.objects.exclude(image='').values_list('image', 'pk'))
+        workers = max(1, options['workers'])
+        self.stdout.write(
+            f'Checking {len(covers)} covers against {settings.COVER_FORMAT}, '
+            f'{settings.COVER_MAX_SIDE}px, quality {settings.COVER_QUALITY}...'
+        )
+
+        if options['dry_run']:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                checked = list(pool.map(_check, covers, chunksize=16))
+            failing = [(name, size) for name, needed, size in checked if needed]
+            unreadable = sum(needed is None for _, needed, _ in checked)
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(failing)} covers ({sum(size for _, size in failing) / 2 ** 20:.1f} MB) would be re-encoded, '
+                f'{unreadable} could not be read'
+            ))
+            return
+
+        rewritten = unreadable = before = after = 0
+        pending = []
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(images.normalise_stored, covers, chunksize=4):
+                if 'error' in result:
+                    unreadable += 1
+                    self.stdout.write(self.style.WARNING(f'{result["name"]}: {result["error"]}'))
+                elif 'image' in result:
+                    rewritten += 1
+                    before += result['bytes']
+                    after += result['stored']
+                    pending.append((covers[result['name']], result))
+                if len(pending) >= BATCH_SIZE:
+                    self.save(pending)
+                    pending = []
+        if pending:
+            self.save(pending)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-encoded {rewritten} of {len(covers)} covers ({before / 2 ** 20:.1f} MB -> {after / 2 ** 20:.1f} MB), '
+            f'{unreadable} could not be read, in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def save(self, pending):
+        """Point the rows at the new files and queue the old ones for the sweeper."""
+        with transaction.atomic():
+            old = dict(IssueCover.objects.filter(pk__in=[pk for pk, _ in pending]).values_list('pk', 'thumbnail'))
+            updates = [
+                IssueCover(pk=pk, image=result['image'], thumbnail=result['thumbnail'])
+                for pk, result in pending if pk in old
+            ]
+            IssueCover.objects.bulk_update(updates, ['image', 'thumbnail'])
+            changes.record(IssueCover, [cover.pk for cover in updates], Change.UPDATE)
+            sweeper.queue_files(
+                [result['name'] for pk, result in pending if pk in old] + [old[cover.pk] for cover in updates]
+            )
+            # Covers deleted while they were being re-encoded: their new files are orphans right away
+            sweeper.queue_files(
+                [name for pk, result in pending if pk not in old for name in (result['image'], result['thumbnail'])]
+            )
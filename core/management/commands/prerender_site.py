@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from django.utils import translation
+from core.coappearances import TOP_CO_STARS
+from core.context_processors import PRERENDER_KEY
+from core.models import Woman, Issue, IssueCover, Appearance, CoAppearance, WomanStat, YearSectionStat, YearStat
+from core.views import WomanListView, normalize_text
+
+MANIFEST_NAME = '.prerender-manifest.json'
+# The issue grid's cover JSON: written as index.json so the front server sends it as application/json
+JSON_PAGE = re.compile(r'/issue/\d+/covers/$')
+
+_client = None
+
+
+def _render(url, dest, host):
+    """Render one page through the full middleware stack and write it atomically."""
+    global _client
+    if _client is None:
+        import django
+        django.setup()
+        from django.test import Client
+        _client = Client(HTTP_HOST=host)
+
+    response = _client.get(url, **{PRERENDER_KEY: True})
+    if response.status_code != 200:
+        return url, response.status_code
+
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix('.tmp')
+    tmp.write_bytes(response.content)
+    os.replace(tmp, dest)
+    return url, 200
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        'Pre-renders every public page in all LANGUAGES to a static directory. '
+        'Query-string pages are written as issue/year/<year>/index.html and woman/page/<n>/index.html; '
+        'the front server should rewrite "?year=" and "?page=" to those paths.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory receiving the static site')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel render processes')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only re-render pages whose underlying rows changed since the last build')
+        parser.add_argument('--host', default=None, help='Host header used for rendering (defaults to ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        output = Path(options['output']).resolve()
+        output.mkdir(parents=True, exist_ok=True)
+        manifest_path = output / MANIFEST_NAME
+        host = options['host'] or self.default_host()
+
+        previous = {}
+        if options['incremental'] and manifest_path.exists():
+            previous = json.loads(manifest_path.read_text(encoding='utf-8'))
+
+        site_hash = self.site_hash()
+        if previous.get('site_hash') != site_hash:
+            # Templates or translations changed: every page is stale
+            previous = {}
+        old_pages = previous.get('pages', {})
+
+        pages = {}
+        for lang, _ in settings.LANGUAGES:
+            with translation.override(lang):
+                for url, fingerprint in self.pages():
+                    pages[url] = fingerprint
+
+        todo = [url for url, fingerprint in pages.items() if old_pages.get(url) != fingerprint
+                or not self.destination(output, url).exists()]
+        removed = [url for url in old_pages if url not in pages]
+
+        for url in removed:
+            dest = self.destination(output, url)
+            if dest.exists():
+                dest.unlink()
+
+        self.stdout.write(f'{len(pages)} pages, {len(todo)} to render, {len(removed)} removed')
+
+        failures = []
+        if todo:
+            # Worker processes open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+                futures = [pool.submit(_render, url, str(self.destination(output, url)), host) for url in todo]
+                for future in futures:
+                    url, status = future.result()
+                    if status != 200:
+                        failures.append((url, status))
+                        pages.pop(url, None)
+
+        manifest_path.write_text(json.dumps({'site_hash': site_hash, 'pages': pages}, indent=0), encoding='utf-8')
+
+        for url, status in failures:
+            self.stdout.write(self.style.WARNING(f'{url} returned {status}'))
+        if failures:
+            raise CommandError(f'{len(failures)} page(s) failed to render')
+        self.stdout.write(self.style.SUCCESS(f'Rendered {len(todo)} pages into {output}'))
+
+    def default_host(self):
+        for host in settings.ALLOWED_HOSTS:
+            if host not in ('*',):
+                return host.lstrip('.')
+        return 'localhost'
+
+    def destination(self, output, url):
+        path, _, query = url.partition('?')
+        if query:
+            key, _, value = query.partition('=')
+            path = f'{path}{key}/{value}/'
+        return output / path.lstrip('/') / ('index.json' if JSON_PAGE.search(path) else 'index.html')
+
+    def site_hash(self):
+        """Hash of everything shared by all pages: templates, static references and compiled catalogues."""
+        digest = hashlib.sha1()
+        roots = [Path(settings.BASE_DIR) / 'core' / 'templates'] + [Path(p) for p in settings.LOCALE_PATHS]
+        for root in roots:
+            for path in sorted(root.rglob('*')):
+                if path.suffix in ('.html', '.mo'):
+                    digest.update(str(path.relative_to(root)).encode('utf-8'))
+                    digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def pages(self):
+        """Yield (url, fingerprint) for every public page in the active language."""
+        yield reverse('home'), ''
+        yield from self.woman_list_pages()
+        yield from self.woman_pages()
+        yield from self.issue_pages()
+        yield from self.year_pages()
+        yield from self.cover_pages()
+        yield reverse('stats'), _digest(
+            list(YearStat.objects.values_list()),
+            list(YearSectionStat.objects.order_by('year', 'section_id').values_list('year', 'section__name', 'appearances')),
+            list(WomanStat.objects.order_by('-appearances', 'woman__name').values_list('woman__name', 'appearances', 'first_year')[:20]),
+        )
+
+    def woman_list_pages(self):
+        names = sorted(Woman.objects.values_list('pk', 'name'), key=lambda w: normalize_text(w[1]))
+        per_page = WomanListView.paginate_by
+        chunks = [names[i:i + per_page] for i in range(0, len(names), per_page)] or [[]]
+        url = reverse('woman_list')
+        for number, chunk in enumerate(chunks, start=1):
+            fingerprint = _digest(chunk, len(chunks))
+            if number == 1:
+                yield url, fingerprint
+            yield f'{url}?page={number}', fingerprint
+
+    def woman_pages(self):
+        rows = defaultdict(list)
+        appearances = Appearance.objects.order_by('woman_id', 'pk').values_list(
+            'woman_id', 'pk', 'issue_id', 'issue__publishing_date', 'issue__edition', 'section__name'
+        )
+        for row in appearances.iterator():
+            rows[row[0]].append(row[1:])
+
+        # The co-star list changes with other women's appearances, so it is part of the page's fingerprint
+        co_stars = defaultdict(list)
+        pairs = CoAppearance.objects.order_by('woman_id', '-shared_issues', 'other__name').values_list(
+            'woman_id', 'other_id', 'other__name', 'shared_issues'
+        )
+        for row in pairs.iterator():
+            if len(co_stars[row[0]]) < TOP_CO_STARS:
+                co_stars[row[0]].append(row[1:])
+
+        for pk, name in Woman.objects.values_list('pk', 'name').iterator():
+            yield reverse('woman_detail', kwargs={'pk': pk}), _digest(name, rows.get(pk, []), co_stars.get(pk, []))
+
+    def issue_pages(self):
+        covers = defaultdict(list)
+        for issue_id, cover_id, image in IssueCover.objects.order_by('issue_id', 'pk').values_list('issue_id', 'pk', 'image'):
+            covers[issue_id].append((cover_id, image))
+
+        rows = defaultdict(list)
+        appearances = Appearance.objects.order_by('issue_id', 'pk').values_list(
+            'issue_id', 'pk', 'woman_id', 'woman__name', 'section_id', 'section__name'
+        )
+        for row in appearances.iterator():
+            rows[row[0]].append(row[1:])
+
+        for pk, publishing_date, edition in Issue.objects.values_list('pk', 'publishing_date', 'edition').iterator():
+            yield reverse('issue_detail', kwargs={'pk': pk}), _digest(
+                publishing_date, edition, covers.get(pk, []), rows.get(pk, [])
+            )
+
+    def year_pages(self):
+        covers = defaultdict(list)
+        for issue_id, image, thumbnail in IssueCover.objects.order_by('issue_id', 'pk').values_list('issue_id', 'image', 'thumbnail'):
+            covers[issue_id].append((image, thumbnail))
+
+        by_year = defaultdict(list)
+        for pk, publishing_date, edition in Issue.objects.order_by('publishing_date').values_list('pk', 'publishing_date', 'edition'):
+            by_year[publishing_date.year].append((pk, publishing_date, edition, covers.get(pk, [])))
+
+        years = sorted(by_year)
+        url = reverse('issue_list')
+        if not years:
+            yield url, ''
+            return
+        for year in years:
+            # The year navigation depends on the full list of years
+            fingerprint = _digest(years, by_year[year])
+            if year == years[0]:
+                yield url, fingerprint
+            yield f'{url}?year={year}', fingerprint
+
+    def cover_pages(self):
+        """The JSON the issue grid fetches for issues with more than one cover."""
+        covers = defaultdict(list)
+        for issue_id, *cover in IssueCover.objects.order_by('issue_id', 'pk').values_list('issue_id', 'pk', 'image', 'thumbnail'):
+            covers[issue_id].append(cover)
+        for pk, rows in covers.items():
+            if len(rows) > 1:
+                yield reverse('issue_covers', kwargs={'pk': pk}), _digest(rows)
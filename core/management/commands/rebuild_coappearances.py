@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core import coappearances
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the "appeared alongside" table from all appearances'
+
+    def handle(self, *args, **options):
+        count = coappearances.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} co-appearance pairs'))
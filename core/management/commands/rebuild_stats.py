@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from core import stats
+from core.models import YearStat
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-year, per-section and per-woman statistics tables'
+
+    def handle(self, *args, **options):
+        stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {YearStat.objects.count()} years'))
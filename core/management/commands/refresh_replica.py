@@ -0,0 +1,25 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core import replica
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database into the read replica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running and refresh every N seconds (keep it below REPLICA_MAX_STALENESS)')
+        parser.add_argument('--pages', type=int, default=-1,
+                            help='Pages copied per backup step (-1 copies everything in one step)')
+
+    def handle(self, *args, **options):
+        if replica.REPLICA not in settings.DATABASES:
+            raise CommandError('No replica configured. Set DJANGO_READ_REPLICA=1.')
+
+        while True:
+            seconds = replica.refresh(pages=options['pages'])
+            self.stdout.write(self.style.SUCCESS(f'Replica refreshed in {seconds:.2f}s'))
+            if options['every'] is None:
+                break
+            time.sleep(max(0.0, options['every'] - seconds))
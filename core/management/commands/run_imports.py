@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core import ingest
+from core.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = 'Runs the queued spreadsheet imports, requeueing the ones left running by a dead process'
+
+    def handle(self, *args, **options):
+        requeued = ingest.requeue_stale()
+        queued = ImportJob.objects.filter(status=ImportJob.QUEUED).count()
+        ran = ingest.run_pending()
+        self.stdout.write(self.style.SUCCESS(f'Ran {ran} import jobs ({queued} queued, {requeued} of them requeued)'))
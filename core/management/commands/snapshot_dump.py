@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from core import snapshot
+
+
+class Command(BaseCommand):
+    help = 'Dumps the catalogue to a compressed JSON Lines snapshot (and optionally the covers to a tar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file, e.g. catalogue.jsonl.gz')
+        parser.add_argument('--covers', metavar='TAR', help='Also write every cover image to this tar file')
+        parser.add_argument('--level', type=int, default=6, help='gzip compression level (1-9)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = snapshot.dump(options['path'], level=options['level'])
+        summary = ', '.join(f'{rows} {table}' for table, rows in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Dumped {summary} in {time.perf_counter() - start:.2f}s'))
+
+        if options['covers']:
+            start = time.perf_counter()
+            count = snapshot.dump_covers(options['covers'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {count} cover files in {time.perf_counter() - start:.2f}s'))
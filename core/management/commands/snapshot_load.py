@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core import snapshot
+
+
+class Command(BaseCommand):
+    help = 'Restores a snapshot written by snapshot_dump into an empty catalogue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file written by snapshot_dump')
+        parser.add_argument('--covers', metavar='TAR', help='Also extract the cover images from this tar file')
+        parser.add_argument('--clear', action='store_true', help='Delete the existing catalogue first')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['clear']:
+            snapshot.clear()
+        try:
+            counts = snapshot.load(options['path'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        summary = ', '.join(f'{rows} {table}' for table, rows in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Loaded {summary} in {time.perf_counter() - start:.2f}s'))
+
+        if options['covers']:
+            start = time.perf_counter()
+            count = snapshot.load_covers(options['covers'])
+            self.stdout.write(self.style.SUCCESS(f'Extracted {count} cover files in {time.perf_counter() - start:.2f}s'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core import sweeper
+from core.models import OrphanedFile
+
+
+class Command(BaseCommand):
+    help = 'Removes queued orphaned media files from storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Stop after removing this many files')
+
+    def handle(self, *args, **options):
+        queued = OrphanedFile.objects.count()
+        removed = sweeper.sweep(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} of {queued} queued files'))
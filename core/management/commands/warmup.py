@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core import warmup
+
+
+class Command(BaseCommand):
+    help = 'Compiles the templates, loads the translations, reverses the URLs and fills the caches, timing each phase'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-database', action='store_true', help='Skip the phases that query the database')
+
+    def handle(self, *args, **options):
+        timings = warmup.run(database=not options['no_database'])
+        for phase, count, elapsed in timings:
+            self.stdout.write(f'{phase}: {count} in {elapsed * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Warmed up in {sum(t for _, _, t in timings) * 1000:.1f} ms'))
@@ -0,0 +1,140 @@
+"""
+Serving of uploaded media (covers) in production.
+
+serve() answers conditional requests (ETag / Last-Modified, 304) and byte
+ranges itself. With settings.MEDIA_SENDFILE set, it only checks the request
+and lets the front server send the bytes: nginx through X-Accel-Redirect to
+an internal location, Apache or lighttpd through X-Sendfile.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+CHUNK_SIZE = 64 * 1024
+
+# name.<12 hex digits>.ext, the same shape as the fingerprinted static files:
+# the content behind such a name never changes
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Other names can be replaced in place (e.g. snapshot_load --covers); revalidate with the ETag
+REVALIDATE = 'public, no-cache'
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _byte_range(header, size):
+    """
+    (start, end) for a single 'bytes=' range, None to send the whole file
+    (no header, several ranges, or a malformed one) or False when unsatisfiable.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith('"'):
+        return value == etag
+    modified = parse_http_date_safe(value)
+    return modified is not None and int(mtime) <= modified
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _sendfile(name, fullpath):
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    else:
+        response['X-Sendfile'] = fullpath
+    # Let the front server pick the type from the file it sends
+    del response['Content-Type']
+    return response
+
+
+def _stream(request, fullpath, stat, etag):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    size = stat.st_size
+
+    byte_range = None
+    if _if_range_matches(request, etag, stat.st_mtime):
+        byte_range = _byte_range(request.headers.get('Range'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read(fullpath, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(fullpath)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404
+    if not os.path.isfile(fullpath) or any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+
+    etag = _etag(stat)
+    cache_control = IMMUTABLE if HASHED_NAME.search(path) else REVALIDATE
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        if settings.MEDIA_SENDFILE:
+            # The front server handles Range itself
+            response = _sendfile(path, fullpath)
+        else:
+            response = _stream(request, fullpath, stat, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,102 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_coappearances(apps, schema_editor):
+    """Count the pairs of the existing catalogue; later changes only refresh the women they touch."""
+    # One INSERT ... SELECT over Appearance columns that already exist at this point
+    from core import coappearances
+    coappearances.rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_issuecover'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='appearance',
+            options={'ordering': ['issue__publishing_date'], 'verbose_name': 'Appearance', 'verbose_name_plural': 'Appearances'},
+        ),
+        migrations.AlterModelOptions(
+            name='issue',
+            options={'verbose_name': 'Issue', 'verbose_name_plural': 'Issues'},
+        ),
+        migrations.AlterModelOptions(
+            name='issuecover',
+            options={'verbose_name': 'Issue Cover', 'verbose_name_plural': 'Issue Covers'},
+        ),
+        migrations.AlterModelOptions(
+            name='section',
+            options={'verbose_name': 'Section', 'verbose_name_plural': 'Sections'},
+        ),
+        migrations.AlterModelOptions(
+            name='woman',
+            options={'verbose_name': 'Woman', 'verbose_name_plural': 'Women'},
+        ),
+        migrations.AlterField(
+            model_name='appearance',
+            name='issue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.issue', verbose_name='Issue'),
+        ),
+        migrations.AlterField(
+            model_name='appearance',
+            name='section',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.section', verbose_name='Section'),
+        ),
+        migrations.AlterField(
+            model_name='appearance',
+            name='woman',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.woman', verbose_name='Woman'),
+        ),
+        migrations.AlterField(
+            model_name='issue',
+            name='edition',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Edition'),
+        ),
+        migrations.AlterField(
+            model_name='issue',
+            name='publishing_date',
+            field=models.DateField(verbose_name='Publishing Date'),
+        ),
+        migrations.AlterField(
+            model_name='issuecover',
+            name='image',
+            field=models.ImageField(upload_to='covers/', verbose_name='Image'),
+        ),
+        migrations.AlterField(
+            model_name='issuecover',
+            name='issue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='covers', to='core.issue', verbose_name='Issue'),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='name',
+            field=models.CharField(max_length=255, unique=True, verbose_name='Name'),
+        ),
+        migrations.AlterField(
+            model_name='woman',
+            name='name',
+            field=models.CharField(max_length=255, unique=True, verbose_name='Name'),
+        ),
+        migrations.CreateModel(
+            name='CoAppearance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shared_issues', models.PositiveIntegerField(verbose_name='Shared issues')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.woman', verbose_name='Appeared with')),
+                ('woman', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_appearances', to='core.woman', verbose_name='Woman')),
+            ],
+            options={
+                'verbose_name': 'Co-appearance',
+                'verbose_name_plural': 'Co-appearances',
+                'indexes': [models.Index(fields=['woman', '-shared_issues'], name='core_coapp_top_idx')],
+                'unique_together': {('woman', 'other')},
+            },
+        ),
+        migrations.RunPython(fill_coappearances, migrations.RunPython.noop),
+    ]
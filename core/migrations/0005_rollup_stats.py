@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_stats(apps, schema_editor):
+    """Compute the rollups of the existing catalogue; later changes only refresh the years and women they touch."""
+    # Aggregates over Issue and Appearance columns that already exist at this point
+    from core import stats
+    stats.rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_coappearance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YearStat',
+            fields=[
+                ('year', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Year')),
+                ('issues', models.PositiveIntegerField(default=0, verbose_name='Issues')),
+                ('appearances', models.PositiveIntegerField(default=0, verbose_name='Appearances')),
+                ('new_faces', models.PositiveIntegerField(default=0, verbose_name='New faces')),
+            ],
+            options={
+                'verbose_name': 'Year statistics',
+                'verbose_name_plural': 'Year statistics',
+                'ordering': ['year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WomanStat',
+            fields=[
+                ('woman', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.woman', verbose_name='Woman')),
+                ('appearances', models.PositiveIntegerField(default=0, verbose_name='Appearances')),
+                ('first_year', models.PositiveIntegerField(verbose_name='First year')),
+            ],
+            options={
+                'verbose_name': 'Woman statistics',
+                'verbose_name_plural': 'Woman statistics',
+                'indexes': [models.Index(fields=['-appearances'], name='core_womanstat_top_idx'), models.Index(fields=['first_year'], name='core_womanstat_first_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='YearSectionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Year')),
+                ('appearances', models.PositiveIntegerField(default=0, verbose_name='Appearances')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.section', verbose_name='Section')),
+            ],
+            options={
+                'verbose_name': 'Year/section statistics',
+                'verbose_name_plural': 'Year/section statistics',
+                'unique_together': {('year', 'section')},
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_rollup_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['edition'], name='core_issue_edition_idx'),
+        ),
+    ]
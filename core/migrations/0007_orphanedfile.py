@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_issue_edition_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrphanedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Name')),
+                ('queued_at', models.DateTimeField(auto_now_add=True, verbose_name='Queued at')),
+            ],
+            options={
+                'verbose_name': 'Orphaned file',
+                'verbose_name_plural': 'Orphaned files',
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:10
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+
+def section_key(name):
+    # Frozen copy of core.models.section_key
+    folded = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('ASCII')
+    return ' '.join((folded or name).casefold().split())
+
+
+def fill_section_keys(apps, schema_editor):
+    """Key every section, merging the ones whose names only differ in case, accents or spacing."""
+    Section = apps.get_model('core', 'Section')
+    Appearance = apps.get_model('core', 'Appearance')
+    YearSectionStat = apps.get_model('core', 'YearSectionStat')
+
+    canonical = {}
+    merged = False
+    for section in Section.objects.order_by('pk'):
+        key = section_key(section.name)
+        target = canonical.get(key)
+        if target is None:
+            canonical[key] = section
+            section.key = key
+            section.save(update_fields=['key'])
+            continue
+        Appearance.objects.filter(section=section).update(section=target)
+        section.delete()
+        merged = True
+
+    if merged:
+        # Rebuild the per-section rollup for the merged sections
+        YearSectionStat.objects.all().delete()
+        rows = (
+            Appearance.objects.annotate(y=ExtractYear('issue__publishing_date')).order_by()
+            .values('y', 'section_id').annotate(n=Count('id'))
+        )
+        YearSectionStat.objects.bulk_create(
+            [YearSectionStat(year=r['y'], section_id=r['section_id'], appearances=r['n']) for r in rows]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_orphanedfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='key',
+            field=models.CharField(editable=False, max_length=255, null=True, verbose_name='Key'),
+        ),
+        migrations.RunPython(fill_section_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='section',
+            name='key',
+            field=models.CharField(editable=False, max_length=255, unique=True, verbose_name='Key'),
+        ),
+        migrations.CreateModel(
+            name='SectionAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Key')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='core.section', verbose_name='Section')),
+            ],
+            options={
+                'verbose_name': 'Section alias',
+                'verbose_name_plural': 'Section aliases',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:31
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_section_key_sectionalias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(storage=core.models.import_storage, upload_to='%Y/%m/', verbose_name='File')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('rows_parsed', models.PositiveIntegerField(default=0, verbose_name='Rows parsed')),
+                ('rows_inserted', models.PositiveIntegerField(default=0, verbose_name='Rows inserted')),
+                ('rows_skipped', models.PositiveIntegerField(default=0, verbose_name='Rows skipped')),
+                ('errors', models.PositiveIntegerField(default=0, verbose_name='Errors')),
+                ('log', models.TextField(blank=True, verbose_name='Log')),
+            ],
+            options={
+                'verbose_name': 'Import job',
+                'verbose_name_plural': 'Import jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
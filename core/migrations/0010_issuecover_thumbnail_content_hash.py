@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issuecover',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='Content hash'),
+        ),
+        migrations.AddField(
+            model_name='issuecover',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='covers/thumbs/', verbose_name='Thumbnail'),
+        ),
+    ]
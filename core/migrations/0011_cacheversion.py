@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_issuecover_thumbnail_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Name')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Version')),
+            ],
+            options={
+                'verbose_name': 'Cache version',
+                'verbose_name_plural': 'Cache versions',
+            },
+        ),
+    ]
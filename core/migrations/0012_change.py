@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_cacheversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20, verbose_name='Model')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('action', models.CharField(choices=[('insert', 'Insert'), ('update', 'Update'), ('delete', 'Delete')], max_length=6, verbose_name='Action')),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Recorded at')),
+            ],
+            options={
+                'verbose_name': 'Change',
+                'verbose_name_plural': 'Changes',
+            },
+        ),
+        # Seed the log with the existing catalogue, so a consumer starting at cursor 0 gets all of it
+        migrations.RunSQL(
+            [
+                f"INSERT INTO core_change (model, object_id, action, recorded_at) "
+                f"SELECT '{model}', id, 'insert', CURRENT_TIMESTAMP FROM core_{model} ORDER BY id"
+                for model in ('woman', 'section', 'issue', 'issuecover', 'appearance')
+            ],
+            migrations.RunSQL.noop,
+        ),
+    ]
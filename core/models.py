@@ -1,4 +1,8 @@
-from django.db import models
+import unicodedata
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 # Create your models here.
@@ -13,8 +17,47 @@ class Woman(models.Model):
     def __str__(self):
         return self.name
 
+def section_key(name):
+    """Canonical form of a section name: no accents, case or extra whitespace."""
+    folded = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('ASCII')
+    return ' '.join((folded or name).casefold().split())
+
+class SectionManager(models.Manager):
+    def resolve(self, name):
+        """
+        Return the section a typed name refers to, following aliases, and
+        create it only when nothing matches. Write paths that only need the
+        id use core.dimensions.section_id(), which skips the query.
+        """
+        from .dimensions import section_id
+
+        return self.get(pk=section_id(name, verify=True))
+
+    def merge(self, target, sources):
+        """
+        Repoint every appearance of sources to target with one UPDATE,
+        remember their keys as aliases and delete them.
+        """
+        from .signals import batched_appearance_changes
+
+        source_ids = [s.pk for s in sources if s.pk != target.pk]
+        if not source_ids:
+            return 0
+        with transaction.atomic(), batched_appearance_changes():
+            moved = Appearance.objects.filter(section_id__in=source_ids).update(section=target)
+            SectionAlias.objects.filter(section_id__in=source_ids).update(section=target)
+            SectionAlias.objects.bulk_create(
+                [SectionAlias(key=key, section=target) for key in self.filter(pk__in=source_ids).values_list('key', flat=True)],
+                ignore_conflicts=True,
+            )
+            self.filter(pk__in=source_ids).delete()
+        return moved
+
 class Section(models.Model):
     name = models.CharField(max_length=255, unique=True, verbose_name=_("Name"))
+    key = models.CharField(max_length=255, unique=True, editable=False, verbose_name=_("Key"))
+
+    objects = SectionManager()
 
     class Meta:
         verbose_name = _("Section")
@@ -23,6 +66,26 @@ class Section(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.key = section_key(self.name)
+        super().save(*args, **kwargs)
+
+class SectionAlias(models.Model):
+    """Another spelling of a section, left behind when sections are merged."""
+    key = models.CharField(max_length=255, unique=True, verbose_name=_("Key"))
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='aliases', verbose_name=_("Section"))
+
+    class Meta:
+        verbose_name = _("Section alias")
+        verbose_name_plural = _("Section aliases")
+
+    def __str__(self):
+        return f"{self.key} -> {self.section}"
+
+    def save(self, *args, **kwargs):
+        self.key = section_key(self.key)
+        super().save(*args, **kwargs)
+
 class Issue(models.Model):
     publishing_date = models.DateField(verbose_name=_("Publishing Date"))
     edition = models.IntegerField(null=True, blank=True, verbose_name=_("Edition"))
@@ -31,6 +94,18 @@ class Issue(models.Model):
         verbose_name = _("Issue")
         verbose_name_plural = _("Issues")
         unique_together = ('publishing_date', 'edition')
+        indexes = [
+            # Admin autocomplete looks issues up by edition number
+            models.Index(fields=['edition'], name='core_issue_edition_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded year so a date change refreshes the year the issue left
+        loaded = instance.__dict__.get('publishing_date')
+        instance._loaded_year = loaded.year if loaded else None
+        return instance
 
     def __str__(self):
         edition_str = f" Ed. {self.edition}" if self.edition else ""
@@ -39,6 +114,9 @@ class Issue(models.Model):
 class IssueCover(models.Model):
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='covers', verbose_name=_("Issue"))
     image = models.ImageField(upload_to='covers/', verbose_name=_("Image"))
+    thumbnail = models.ImageField(upload_to='covers/thumbs/', blank=True, verbose_name=_("Thumbnail"))
+    # SHA-256 of the original file, so re-running an import skips covers it already has
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name=_("Content hash"))
 
     class Meta:
         verbose_name = _("Issue Cover")
@@ -47,11 +125,107 @@ class IssueCover(models.Model):
     def __str__(self):
         return f"Cover for {self.issue}"
 
+class OrphanedFile(models.Model):
+    """A media file whose row is gone, waiting for core.sweeper to remove it from storage."""
+    name = models.CharField(max_length=255, verbose_name=_("Name"))
+    queued_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Queued at"))
+
+    class Meta:
+        verbose_name = _("Orphaned file")
+        verbose_name_plural = _("Orphaned files")
+
+    def __str__(self):
+        return self.name
+
+class CacheVersion(models.Model):
+    """Bumped when cached rows change, so every process can tell its copy is stale (see core.dimensions)."""
+    name = models.CharField(max_length=50, primary_key=True, verbose_name=_("Name"))
+    version = models.PositiveIntegerField(default=0, verbose_name=_("Version"))
+
+    class Meta:
+        verbose_name = _("Cache version")
+        verbose_name_plural = _("Cache versions")
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+def import_storage():
+    # Uploaded spreadsheets stay out of MEDIA_ROOT, which is publicly served
+    return FileSystemStorage(location=settings.IMPORT_ROOT)
+
+class ImportJob(models.Model):
+    """A CSV upload ingested in the background by core.ingest."""
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, _("Queued")),
+        (RUNNING, _("Running")),
+        (DONE, _("Done")),
+        (FAILED, _("Failed")),
+    ]
+
+    file = models.FileField(upload_to='%Y/%m/', storage=import_storage, verbose_name=_("File"))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, verbose_name=_("Status"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created at"))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Started at"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Finished at"))
+    rows_parsed = models.PositiveIntegerField(default=0, verbose_name=_("Rows parsed"))
+    rows_inserted = models.PositiveIntegerField(default=0, verbose_name=_("Rows inserted"))
+    rows_skipped = models.PositiveIntegerField(default=0, verbose_name=_("Rows skipped"))
+    errors = models.PositiveIntegerField(default=0, verbose_name=_("Errors"))
+    log = models.TextField(blank=True, verbose_name=_("Log"))
+
+    class Meta:
+        verbose_name = _("Import job")
+        verbose_name_plural = _("Import jobs")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file.name} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def progress(self):
+        """The fields streamed to the browser."""
+        return {
+            'status': self.status,
+            'rows_parsed': self.rows_parsed,
+            'rows_inserted': self.rows_inserted,
+            'rows_skipped': self.rows_skipped,
+            'errors': self.errors,
+            'log': self.log,
+        }
+
+class AppearanceQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Bulk updates bypass post_save, so report the affected rows ourselves
+        from .changes import record
+        from .signals import notify_appearances_changed
+
+        keys = ('pk', 'woman_id', 'issue_id', 'section_id')
+        before = list(self.values_list(*keys))
+        count = super().update(**kwargs)
+
+        pks = [row[0] for row in before]
+        rows = {row[1:] for row in before}
+        for start in range(0, len(pks), 500):
+            rows.update(
+                Appearance.objects.filter(pk__in=pks[start:start + 500]).values_list(*keys[1:])
+            )
+        notify_appearances_changed(rows)
+        record(Appearance, pks, Change.UPDATE)
+        return count
+
+    update.alters_data = True
+
 class Appearance(models.Model):
     woman = models.ForeignKey(Woman, on_delete=models.CASCADE, verbose_name=_("Woman"))
     section = models.ForeignKey(Section, on_delete=models.CASCADE, verbose_name=_("Section"))
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, verbose_name=_("Issue"))
 
+    objects = AppearanceQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Appearance")
         verbose_name_plural = _("Appearances")
@@ -59,3 +233,105 @@ class Appearance(models.Model):
 
     def __str__(self):
         return f"{self.woman} in {self.issue} ({self.section})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded keys so edits can report the values they replaced
+        instance._loaded_keys = instance.key_triple()
+        return instance
+
+    def key_triple(self):
+        return (self.__dict__.get('woman_id'), self.__dict__.get('issue_id'), self.__dict__.get('section_id'))
+
+class Change(models.Model):
+    """
+    Append-only log of inserts, updates and deletes of catalogue rows,
+    written by core.changes in the same transaction as the change. The id
+    is the cursor downstream consumers sync from.
+    """
+    INSERT, UPDATE, DELETE = 'insert', 'update', 'delete'
+    ACTION_CHOICES = [
+        (INSERT, _("Insert")),
+        (UPDATE, _("Update")),
+        (DELETE, _("Delete")),
+    ]
+
+    model = models.CharField(max_length=20, verbose_name=_("Model"))
+    object_id = models.BigIntegerField(verbose_name=_("Object ID"))
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES, verbose_name=_("Action"))
+    recorded_at = models.DateTimeField(default=timezone.now, verbose_name=_("Recorded at"))
+
+    class Meta:
+        verbose_name = _("Change")
+        verbose_name_plural = _("Changes")
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.model} {self.object_id}"
+
+class CoAppearance(models.Model):
+    """
+    Denormalised "appeared alongside" graph: one row per ordered pair of women
+    with the number of distinct issues they share. Maintained by
+    core.coappearances from the appearances_changed signal.
+    """
+    woman = models.ForeignKey(Woman, on_delete=models.CASCADE, related_name='co_appearances', verbose_name=_("Woman"))
+    other = models.ForeignKey(Woman, on_delete=models.CASCADE, related_name='+', verbose_name=_("Appeared with"))
+    shared_issues = models.PositiveIntegerField(verbose_name=_("Shared issues"))
+
+    class Meta:
+        verbose_name = _("Co-appearance")
+        verbose_name_plural = _("Co-appearances")
+        unique_together = ('woman', 'other')
+        indexes = [
+            models.Index(fields=['woman', '-shared_issues'], name='core_coapp_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.woman} with {self.other} ({self.shared_issues})"
+
+class YearStat(models.Model):
+    """Per-year rollup maintained by core.stats."""
+    year = models.PositiveIntegerField(primary_key=True, verbose_name=_("Year"))
+    issues = models.PositiveIntegerField(default=0, verbose_name=_("Issues"))
+    appearances = models.PositiveIntegerField(default=0, verbose_name=_("Appearances"))
+    new_faces = models.PositiveIntegerField(default=0, verbose_name=_("New faces"))
+
+    class Meta:
+        verbose_name = _("Year statistics")
+        verbose_name_plural = _("Year statistics")
+        ordering = ['year']
+
+    def __str__(self):
+        return str(self.year)
+
+class YearSectionStat(models.Model):
+    """Per (year, section) rollup maintained by core.stats."""
+    year = models.PositiveIntegerField(verbose_name=_("Year"))
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, verbose_name=_("Section"))
+    appearances = models.PositiveIntegerField(default=0, verbose_name=_("Appearances"))
+
+    class Meta:
+        verbose_name = _("Year/section statistics")
+        verbose_name_plural = _("Year/section statistics")
+        unique_together = ('year', 'section')
+
+    def __str__(self):
+        return f"{self.year} {self.section}"
+
+class WomanStat(models.Model):
+    """Per-woman rollup (appearance count and debut year) maintained by core.stats."""
+    woman = models.OneToOneField(Woman, on_delete=models.CASCADE, primary_key=True, related_name='stats', verbose_name=_("Woman"))
+    appearances = models.PositiveIntegerField(default=0, verbose_name=_("Appearances"))
+    first_year = models.PositiveIntegerField(verbose_name=_("First year"))
+
+    class Meta:
+        verbose_name = _("Woman statistics")
+        verbose_name_plural = _("Woman statistics")
+        indexes = [
+            models.Index(fields=['-appearances'], name='core_womanstat_top_idx'),
+            models.Index(fields=['first_year'], name='core_womanstat_first_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.woman)
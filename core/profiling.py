@@ -0,0 +1,220 @@
+"""
+Opt-in profiling of single requests, for staff.
+
+A staff user adds ?_profile=<token> (or an X-Profile: <token> header) to
+any URL; the token comes from the profiles page and is signed for that
+user. ProfilerMiddleware then runs the view under cProfile, records every
+SQL query and template render, and writes the capture to PROFILE_ROOT:
+<name>.prof (pstats data) and <name>.json (request, queries, templates).
+
+Other requests only pay for the parameter/header lookup: the template
+timer is only patched in while a capture runs, and one capture runs at a
+time (a second profiled request is served normally). The middleware is
+async capable, so under ASGI unprofiled requests stay on the event loop.
+cProfile only sees the thread it runs in: a profiled async request shows
+the event loop's work, and sync views are best profiled under WSGI.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+from django.utils.text import slugify
+
+PARAM = '_profile'
+HEADER = 'X-Profile'
+SALT = 'core.profiling'
+TOKEN_MAX_AGE = 3600
+# Oldest captures are removed beyond this many
+KEEP = 50
+
+_capture = ContextVar('profile_capture', default=None)
+_busy = threading.Lock()
+_original_render = Template.render
+
+
+def make_token(user):
+    return signing.dumps(user.pk, salt=SALT)
+
+
+def token_user_pk(token):
+    """The user pk a token was made for, or None if it is forged or expired."""
+    try:
+        return signing.loads(token, salt=SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def _timed_render(self, context):
+    capture = _capture.get()
+    if capture is None:
+        return _original_render(self, context)
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        capture['templates'].append({'name': self.origin.template_name or self.name, 'ms': (time.perf_counter() - start) * 1000})
+
+
+def _sql_recorder(capture, alias):
+    def record(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            capture['queries'].append({'alias': alias, 'sql': sql, 'ms': (time.perf_counter() - start) * 1000})
+    return record
+
+
+def profile_root():
+    os.makedirs(settings.PROFILE_ROOT, exist_ok=True)
+    return settings.PROFILE_ROOT
+
+
+def _save(profiler, capture):
+    root = profile_root()
+    name = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{slugify(capture['path'])[:60] or 'root'}"
+    profiler.dump_stats(os.path.join(root, f'{name}.prof'))
+    with open(os.path.join(root, f'{name}.json'), 'w', encoding='utf-8') as f:
+        json.dump(capture, f)
+
+    for old in list_profiles()[KEEP:]:
+        for extension in ('.prof', '.json'):
+            try:
+                os.remove(os.path.join(root, old['name'] + extension))
+            except OSError:
+                pass
+    return name
+
+
+def list_profiles():
+    """Summaries of the saved captures, newest first."""
+    root = profile_root()
+    profiles = []
+    for filename in sorted(os.listdir(root), reverse=True):
+        if filename.endswith('.json'):
+            summary = load_capture(filename[:-5])
+            if summary:
+                profiles.append(summary)
+    return profiles
+
+
+def load_capture(name):
+    """A saved capture's request data, or None if there is no such capture."""
+    if os.path.basename(name) != name:
+        return None
+    try:
+        with open(os.path.join(profile_root(), f'{name}.json'), encoding='utf-8') as f:
+            capture = json.load(f)
+    except (OSError, ValueError):
+        return None
+    capture['name'] = name
+    return capture
+
+
+def render_stats(name, sort='cumulative', limit=60):
+    """pstats report of a capture, sorted by sort, as text."""
+    out = io.StringIO()
+    stats = pstats.Stats(os.path.join(profile_root(), f'{name}.prof'), stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _allowed(user, token):
+    return bool(user and user.is_staff and token_user_pk(token) == user.pk)
+
+
+def _new_capture(request, user):
+    query = request.GET.copy()
+    query.pop(PARAM, None)
+    return {
+        'method': request.method,
+        'path': request.path + (f'?{query.urlencode()}' if query else ''),
+        'user': user.get_username(),
+        'at': timezone.now().isoformat(),
+        'queries': [],
+        'templates': [],
+    }
+
+
+@contextmanager
+def _capturing(capture):
+    """Run the body under cProfile, recording SQL and template renders into capture."""
+    profiler = cProfile.Profile()
+    token = _capture.set(capture)
+    # Only renders in this context are recorded; other threads pass straight through
+    Template.render = _timed_render
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(_sql_recorder(capture, alias)))
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                yield profiler
+            finally:
+                profiler.disable()
+                capture['ms'] = (time.perf_counter() - start) * 1000
+    finally:
+        Template.render = _original_render
+        _capture.reset(token)
+
+
+def _finish(response, profiler, capture):
+    capture['status'] = response.status_code
+    response['X-Profile-Id'] = _save(profiler, capture)
+    return response
+
+
+class ProfilerMiddleware:
+    """
+    Profiles the requests of staff users that carry a valid profiling token.
+    Both sync and async capable, so under ASGI it adds no thread hop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = request.GET.get(PARAM) or request.headers.get(HEADER)
+        if not token or not _allowed(request.user, token) or not _busy.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            capture = _new_capture(request, request.user)
+            with _capturing(capture) as profiler:
+                response = self.get_response(request)
+            return _finish(response, profiler, capture)
+        finally:
+            _busy.release()
+
+    async def __acall__(self, request):
+        token = request.GET.get(PARAM) or request.headers.get(HEADER)
+        if not token:
+            return await self.get_response(request)
+        user = await request.auser()
+        if not _allowed(user, token) or not _busy.acquire(blocking=False):
+            return await self.get_response(request)
+        try:
+            capture = _new_capture(request, user)
+            with _capturing(capture) as profiler:
+                response = await self.get_response(request)
+            return await sync_to_async(_finish)(response, profiler, capture)
+        finally:
+            _busy.release()
@@ -0,0 +1,154 @@
+"""
+Optional SQLite read replica.
+
+refresh() copies the primary database into a second file with SQLite's
+online backup API and swaps it in atomically. ReplicaRouter sends reads of
+core models to that copy while it is fresh enough, and everything else to
+the primary: writes, reads inside a transaction, reads after a write in the
+same request, and reads by a client whose last write the replica does not
+contain yet (ReplicaStickinessMiddleware).
+"""
+import os
+import sqlite3
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+PRIMARY = 'default'
+COOKIE_NAME = 'replica_pin'
+
+# Work queues are polled right after being written; a stale copy would replay them.
+# Cache versions must be current or a process would keep a stale cache.
+PRIMARY_ONLY_MODELS = {'orphanedfile', 'importjob', 'cacheversion'}
+
+# Set for the current request/task: reads must see the primary
+_pinned = ContextVar('replica_pinned', default=False)
+
+_freshness = {'checked': 0.0, 'refreshed_at': None}
+
+
+def refresh(pages=-1, sleep=0.0):
+    """
+    Copy the primary into the replica file. The copy is written next to it
+    and renamed over it, so readers either see the old snapshot or the new one.
+    The file's mtime is set to when the copy started: a write committed while
+    it ran may be missing, so only writes older than that count as contained.
+    Returns the seconds the copy took.
+    """
+    source = str(settings.DATABASES[PRIMARY]['NAME'])
+    target = str(settings.DATABASES[REPLICA]['NAME'])
+    tmp = f'{target}.tmp'
+
+    started = time.time()
+    start = time.perf_counter()
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(tmp)
+    try:
+        # In WAL mode this reads a consistent snapshot without blocking writers
+        src.backup(dst, pages=pages, sleep=sleep)
+        dst.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        dst.close()
+        src.close()
+    os.utime(tmp, (started, started))
+    os.replace(tmp, target)
+    _freshness['checked'] = 0.0
+    return time.perf_counter() - start
+
+
+def refreshed_at():
+    """When the replica's copy started, from its file's mtime (cached for a second), or None if there is none."""
+    now = time.monotonic()
+    if now - _freshness['checked'] > 1.0:
+        try:
+            _freshness['refreshed_at'] = os.stat(settings.DATABASES[REPLICA]['NAME']).st_mtime
+        except OSError:
+            _freshness['refreshed_at'] = None
+        _freshness['checked'] = now
+    return _freshness['refreshed_at']
+
+
+def replica_usable():
+    refreshed = refreshed_at()
+    return refreshed is not None and time.time() - refreshed <= settings.REPLICA_MAX_STALENESS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != 'core':
+            return None
+        if _pinned.get() or model._meta.model_name in PRIMARY_ONLY_MODELS:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            # Derived-table refreshes read what the transaction just wrote
+            return PRIMARY
+        return REPLICA if replica_usable() else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == 'core':
+            _pinned.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes: after a client writes, its reads go to the primary until
+    the replica has been refreshed past that write. Both sync and async
+    capable, so under ASGI the pin is set in the async view's own context.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        pinned = self.pinned(request)
+        token = _pinned.set(pinned)
+        try:
+            response = self.get_response(request)
+            wrote = _pinned.get() and not pinned
+        finally:
+            _pinned.reset(token)
+        return self.remember_write(request, response, wrote)
+
+    async def __acall__(self, request):
+        pinned = self.pinned(request)
+        token = _pinned.set(pinned)
+        try:
+            response = await self.get_response(request)
+            wrote = _pinned.get() and not pinned
+        finally:
+            _pinned.reset(token)
+        return self.remember_write(request, response, wrote)
+
+    def pinned(self, request):
+        """Whether the client wrote something the replica does not contain yet."""
+        last_write = request.COOKIES.get(COOKIE_NAME)
+        refreshed = refreshed_at()
+        try:
+            return refreshed is None or float(last_write) >= refreshed
+        except (TypeError, ValueError):
+            return False
+
+    def remember_write(self, request, response, wrote):
+        if wrote or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            # Once older than the staleness limit, any usable replica contains the write
+            response.set_cookie(
+                COOKIE_NAME, str(time.time()), max_age=settings.REPLICA_MAX_STALENESS, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,62 @@
+import threading
+from contextlib import contextmanager
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+# Sent with rows={(woman_id, issue_id, section_id), ...} whenever appearances are
+# inserted, edited or removed. Edited rows contribute both their old and new values,
+# so receivers can refresh anything derived from either side. Deletes that remove
+# the issues too pass their years, since those issue ids no longer resolve.
+appearances_changed = Signal()
+
+_local = threading.local()
+
+
+def notify_appearances_changed(rows, years=()):
+    rows, years = set(rows), set(years)
+    if not rows and not years:
+        return
+    pending = getattr(_local, 'rows', None)
+    if pending is not None:
+        pending.update(rows)
+        _local.years.update(years)
+    else:
+        appearances_changed.send(sender=None, rows=rows, years=years)
+
+
+@contextmanager
+def batched_appearance_changes():
+    """
+    Collect appearance changes made inside the block and send a single
+    appearances_changed signal at the end, instead of one per row.
+    Used by the importers and bulk views.
+    """
+    if getattr(_local, 'rows', None) is not None:
+        # Nested block: the outermost one sends
+        yield
+        return
+
+    _local.rows, _local.years = set(), set()
+    try:
+        yield
+    except BaseException:
+        _local.rows = None
+        raise
+    rows, years, _local.rows = _local.rows, _local.years, None
+    if rows or years:
+        appearances_changed.send(sender=None, rows=rows, years=years)
+
+
+@receiver(post_save, sender='core.Appearance')
+def appearance_saved(sender, instance, created, **kwargs):
+    rows = {instance.key_triple()}
+    loaded = getattr(instance, '_loaded_keys', None)
+    if not created and loaded:
+        rows.add(loaded)
+    instance._loaded_keys = instance.key_triple()
+    notify_appearances_changed(rows)
+
+
+@receiver(post_delete, sender='core.Appearance')
+def appearance_deleted(sender, instance, **kwargs):
+    notify_appearances_changed({instance.key_triple()})
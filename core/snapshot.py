@@ -0,0 +1,194 @@
+"""
+Snapshot dump/restore of the catalogue, for cloning production to staging.
+
+The format is gzip-compressed JSON Lines: a header line, then for every table
+a line naming its columns followed by one JSON array per row. Tables come in
+foreign key order and keep their primary keys, so loading is a plain series
+of executemany() INSERTs. Derived tables (co-appearances, statistics) are not
+dumped; they are rebuilt after a load.
+"""
+import gzip
+import json
+import tarfile
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+from . import changes, coappearances, dimensions, stats
+from .models import (
+    Woman, Section, SectionAlias, Issue, IssueCover, Appearance, Change, CoAppearance, YearStat, YearSectionStat,
+    WomanStat,
+)
+
+FORMAT = 'magazine-list-snapshot'
+VERSION = 1
+BATCH_SIZE = 5000
+
+# Foreign key order: every table only points at tables above it
+MODELS = [Woman, Section, SectionAlias, Issue, IssueCover, Appearance]
+DERIVED = [CoAppearance, YearStat, YearSectionStat, WomanStat]
+
+
+def _columns(model):
+    return [f.column for f in model._meta.concrete_fields]
+
+
+def _last_migration():
+    return (
+        MigrationRecorder.Migration.objects.filter(app='core')
+        .order_by('-applied', '-id').values_list('name', flat=True).first()
+    )
+
+
+def dump(path, level=6):
+    """Write every core table to path; returns {table: rows}."""
+    counts = {}
+    # One transaction, so every table comes from the same snapshot of a live database:
+    # no dumped row points at one deleted (or misses one inserted) between two tables
+    with transaction.atomic():
+        with gzip.open(path, 'wt', encoding='utf-8', compresslevel=level) as out, connection.cursor() as cursor:
+            out.write(json.dumps({
+                'format': FORMAT, 'version': VERSION,
+                'created': timezone.now().isoformat(), 'migration': _last_migration(),
+            }) + '\n')
+
+            for model in MODELS:
+                table = model._meta.db_table
+                columns = _columns(model)
+                out.write(json.dumps({'table': table, 'columns': columns}) + '\n')
+                cursor.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} ORDER BY {model._meta.pk.column}"
+                )
+                count = 0
+                while rows := cursor.fetchmany(BATCH_SIZE):
+                    # Dates come back as date objects; their ISO form is what SQLite stores
+                    out.writelines(json.dumps(row, default=str, separators=(',', ':')) + '\n' for row in rows)
+                    count += len(rows)
+                counts[table] = count
+    return counts
+
+
+def dump_covers(path):
+    """Stream every cover image and thumbnail into an uncompressed tar (JPEGs do not compress)."""
+    count = 0
+    with tarfile.open(path, 'w|') as tar:
+        for image, thumbnail in IssueCover.objects.values_list('image', 'thumbnail').iterator():
+            for name in (image, thumbnail):
+                if name and default_storage.exists(name):
+                    info = tarfile.TarInfo(name)
+                    info.size = default_storage.size(name)
+                    with default_storage.open(name) as f:
+                        tar.addfile(info, f)
+                    count += 1
+    return count
+
+
+def _read(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != FORMAT or header.get('version') != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} snapshot')
+        yield header
+
+        table, rows = None, []
+        for line in f:
+            record = json.loads(line)
+            if isinstance(record, dict):
+                if table:
+                    yield table, rows
+                table, rows = record, []
+            else:
+                rows.append(record)
+                if len(rows) >= BATCH_SIZE:
+                    yield table, rows
+                    rows = []
+        if table:
+            yield table, rows
+
+
+def _drop_indexes(cursor, tables):
+    """Drop the secondary indexes of the given tables and return the SQL to recreate them (SQLite only)."""
+    if connection.vendor != 'sqlite':
+        return []
+    cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+        f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+        tables,
+    )
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def clear():
+    """Delete the catalogue and everything derived from it."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in DERIVED + MODELS[::-1]:
+            if model in changes.TRACKED.values():
+                changes.record_where(cursor, model, '1 = 1', [], Change.DELETE)
+            cursor.execute(f"DELETE FROM {model._meta.db_table}")
+        dimensions.invalidate()
+
+
+def load(path):
+    """
+    Restore a snapshot into empty core tables; returns {table: rows}.
+    Indexes are dropped during the load and rebuilt once the rows are in.
+    """
+    expected = {m._meta.db_table: _columns(m) for m in MODELS}
+    if any(m.objects.exists() for m in MODELS):
+        raise ValueError('The catalogue is not empty')
+
+    counts = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        reader = _read(path)
+        next(reader)
+        recreate = _drop_indexes(cursor, list(expected))
+        recreate_derived = _drop_indexes(cursor, [m._meta.db_table for m in DERIVED])
+
+        for table, rows in reader:
+            name, columns = table['table'], table['columns']
+            if expected.get(name) != columns:
+                raise ValueError(f'{name} has columns {columns} in the snapshot but {expected.get(name)} here')
+            if rows:
+                cursor.executemany(
+                    f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                    rows,
+                )
+            counts[name] = counts.get(name, 0) + len(rows)
+
+        for sql in recreate:
+            cursor.execute(sql)
+        # Raw inserts bypass the signals that feed the change log
+        for model in MODELS:
+            if model in changes.TRACKED.values():
+                changes.record_where(cursor, model, '1 = 1', [], Change.INSERT)
+        for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+            cursor.execute(sql)
+
+        # Raw inserts send no signals: rebuild the derived tables in one go.
+        # CoAppearance holds millions of pairs; indexing them afterwards is several times faster.
+        coappearances.rebuild()
+        stats.rebuild()
+        for sql in recreate_derived:
+            cursor.execute(sql)
+        # The restored women and sections have other ids than any cached ones
+        dimensions.invalidate()
+    return counts
+
+
+def load_covers(path):
+    """Extract a covers tar into the default storage, replacing existing files."""
+    count = 0
+    with tarfile.open(path, 'r|') as tar:
+        for member in tar:
+            if not member.isfile() or member.name.startswith('/') or '..' in member.name.split('/'):
+                continue
+            if default_storage.exists(member.name):
+                default_storage.delete(member.name)
+            default_storage.save(member.name, ContentFile(tar.extractfile(member).read()))
+            count += 1
+    return count
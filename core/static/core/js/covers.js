@@ -0,0 +1,168 @@
+// Issue list: cover slider
+// Only the first cover is in the page; the others are fetched from the
+// issue's covers endpoint the first time one of its dots is clicked.
+const coverRequests = {};
+
+function alignDoubleCover(img) {
+    // Check if it's a double cover (Landscape orientation)
+    // Using a threshold of 1.2 aspect ratio to be safe
+    const aspect = img.naturalWidth / img.naturalHeight;
+
+    if (aspect > 1.2) {
+        // It's a double cover.
+        // Since it's object-fit: cover, centering chops off the sides.
+        // We want to show the RIGHT side (front cover) usually, but user said "left side" in previous turn.
+        // WAIT. Re-reading user request: 
+        // "Em geral capas dobráveis têm como parte primária o lado esquerdo da imagem"
+        // So user wants LEFT side.
+        // Default object-position is 50% 50%.
+        // We need '0% 50%' (left).
+        img.style.objectPosition = 'left';
+    }
+}
+
+function loadCovers(card, issueId) {
+    if (!coverRequests[issueId]) {
+        const nav = card.querySelector('.cover-nav');
+        coverRequests[issueId] = fetch(nav.dataset.coversUrl)
+            .then(response => {
+                if (!response.ok) throw new Error(`Covers for issue ${issueId}: ${response.status}`);
+                return response.json();
+            })
+            .then(data => {
+                // The first cover is already in the page
+                data.covers.slice(1).forEach((cover, i) => {
+                    const img = document.createElement('img');
+                    img.src = cover.url;
+                    img.id = `cover-${issueId}-${i + 1}`;
+                    img.className = 'cover-image';
+                    img.alt = `Cover ${i + 2}`;
+                    img.onload = () => alignDoubleCover(img);
+                    nav.before(img);
+                });
+            })
+            .catch(error => {
+                delete coverRequests[issueId];
+                throw error;
+            });
+    }
+    return coverRequests[issueId];
+}
+
+async function switchCover(event, issueId, index) {
+    event.preventDefault();
+    event.stopPropagation();
+
+    const card = event.target.closest('.card');
+
+    if (index > 0) {
+        try {
+            await loadCovers(card, issueId);
+        } catch (error) {
+            console.error(error);
+            return;
+        }
+    }
+
+    // Hide all active images
+    const images = card.querySelectorAll('.cover-image');
+    images.forEach(img => img.classList.remove('active'));
+
+    // Show target image
+    const targetImg = card.querySelector(`#cover-${issueId}-${index}`);
+    if (targetImg) targetImg.classList.add('active');
+
+    // Update dots
+    const dots = card.querySelectorAll('.nav-dot');
+    dots.forEach(dot => dot.classList.remove('active'));
+
+    // Activate target dot
+    const targetDot = card.querySelector(`.nav-dot[data-index="${index}"]`);
+    if (targetDot) targetDot.classList.add('active');
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll('.cover-nav[data-count]').forEach(nav => {
+        const issueId = Number(nav.dataset.issue);
+        for (let index = 0; index < Number(nav.dataset.count); index++) {
+            const dot = document.createElement('button');
+            dot.type = 'button';
+            dot.className = index === 0 ? 'nav-dot active' : 'nav-dot';
+            dot.dataset.index = index;
+            dot.addEventListener('click', event => switchCover(event, issueId, index));
+            nav.appendChild(dot);
+        }
+    });
+
+    const coverImages = document.querySelectorAll('.cover-image');
+
+    coverImages.forEach(img => {
+        if (img.complete) {
+            alignDoubleCover(img);
+        } else {
+            img.onload = () => alignDoubleCover(img);
+        }
+    });
+});
+
+// Issue detail: foldout covers
+document.addEventListener("DOMContentLoaded", function () {
+    const coverCards = document.querySelectorAll('.cover-card');
+
+    coverCards.forEach(card => {
+        const img = card.querySelector('img');
+
+        function handleImageLoad() {
+            // Check if it's a double cover (Landscape orientation)
+            // Using a threshold of 1.2 aspect ratio to be safe
+            const aspect = img.naturalWidth / img.naturalHeight;
+
+            if (aspect > 1.2) {
+                card.classList.add('double-cover', 'folded');
+
+                // Add click to toggle
+                card.addEventListener('click', function () {
+                    const isFolded = card.classList.contains('folded');
+
+                    if (isFolded) {
+                        // Unfold
+                        // Calculate target width based on height to keep height constant
+                        // Folded state height:
+                        // We force width=200px. 
+                        // Folded Logic: Image width 200% -> 400px.
+                        // Height = 400 / aspect.
+                        const height = 400 / aspect; // This is the displayed height
+
+                        // Unfolded Logic:
+                        // We want width s.t. height is same?
+                        // Height = Width / aspect.
+                        // If we want Height to be same, then Width must be 400px.
+                        // So simply setting width to 400px should work if 200% was correct estimate.
+
+                        // More generic:
+                        // Folded Img Width = 2 * 200px = 400px.
+                        // If we want unfolded view to show full image at same scale, width should be 400px.
+                        // But maybe we want it distinct?
+                        // Let's just set width to what the image "would be" if width=100% at that height.
+                        // Yes, 400px.
+
+                        card.style.width = '400px';
+                        card.classList.remove('folded');
+                        card.classList.add('unfolded');
+                    } else {
+                        // Fold
+                        card.style.width = '200px';
+                        card.classList.remove('unfolded');
+                        card.classList.add('folded');
+                    }
+                });
+            }
+        }
+
+        if (img.complete) {
+            handleImageLoad();
+        } else {
+            img.onload = handleImageLoad;
+        }
+    });
+});
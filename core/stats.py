@@ -0,0 +1,156 @@
+"""
+Materialised statistics: YearStat, YearSectionStat and WomanStat.
+
+Like core.coappearances, every refresh recomputes the affected keys from the
+source tables, so the rollups converge whatever the write path.
+"""
+from datetime import date
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import ExtractYear
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Appearance, Issue, WomanStat, YearSectionStat, YearStat
+from .signals import appearances_changed
+
+CHUNK_SIZE = 500
+
+
+def _chunks(values):
+    values = sorted(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def _in_years(field, years):
+    # Date ranges instead of __year__in so the publishing_date index is used
+    return reduce(or_, (Q(**{f'{field}__gte': date(y, 1, 1), f'{field}__lt': date(y + 1, 1, 1)}) for y in years))
+
+
+def refresh_women(woman_ids):
+    """Recompute WomanStat rows; returns the debut years that changed."""
+    touched_years = set()
+    for chunk in _chunks(set(woman_ids)):
+        old = WomanStat.objects.filter(woman_id__in=chunk)
+        touched_years.update(old.values_list('first_year', flat=True))
+        old.delete()
+
+        rows = (
+            Appearance.objects.filter(woman_id__in=chunk)
+            .order_by()
+            .values('woman_id')
+            .annotate(total=Count('id'), first=Min('issue__publishing_date'))
+        )
+        stats = [WomanStat(woman_id=r['woman_id'], appearances=r['total'], first_year=r['first'].year) for r in rows]
+        WomanStat.objects.bulk_create(stats)
+        touched_years.update(s.first_year for s in stats)
+    return touched_years
+
+
+def refresh_years(years):
+    """Recompute YearStat and YearSectionStat rows for the given years."""
+    years = sorted(set(years))
+    if not years:
+        return
+
+    for chunk in [years[i:i + 50] for i in range(0, len(years), 50)]:
+        issue_counts = dict(
+            Issue.objects.filter(_in_years('publishing_date', chunk))
+            .annotate(y=ExtractYear('publishing_date')).order_by()
+            .values('y').annotate(n=Count('id')).values_list('y', 'n')
+        )
+        appearances = (
+            Appearance.objects.filter(_in_years('issue__publishing_date', chunk))
+            .annotate(y=ExtractYear('issue__publishing_date')).order_by()
+        )
+        section_counts = list(appearances.values('y', 'section_id').annotate(n=Count('id')).values_list('y', 'section_id', 'n'))
+        new_faces = dict(
+            WomanStat.objects.filter(first_year__in=chunk).order_by()
+            .values('first_year').annotate(n=Count('woman_id')).values_list('first_year', 'n')
+        )
+
+        totals = {}
+        for y, _, n in section_counts:
+            totals[y] = totals.get(y, 0) + n
+
+        YearStat.objects.filter(year__in=chunk).delete()
+        YearSectionStat.objects.filter(year__in=chunk).delete()
+        YearStat.objects.bulk_create([
+            YearStat(year=y, issues=issue_counts.get(y, 0), appearances=totals.get(y, 0), new_faces=new_faces.get(y, 0))
+            for y in chunk
+            if issue_counts.get(y) or totals.get(y) or new_faces.get(y)
+        ])
+        YearSectionStat.objects.bulk_create([
+            YearSectionStat(year=y, section_id=section_id, appearances=n) for y, section_id, n in section_counts
+        ])
+
+
+def refresh(rows, years=()):
+    woman_ids = {w for w, _, _ in rows}
+    issue_ids = {i for _, i, _ in rows}
+
+    with transaction.atomic():
+        issue_years = {}
+        for chunk in _chunks(issue_ids):
+            issue_years.update(Issue.objects.filter(pk__in=chunk).values_list('pk', 'publishing_date'))
+
+        # Issues deleted with the rows no longer resolve: whoever deleted them passed their years
+        years = set(years) | {d.year for d in issue_years.values()}
+        years |= refresh_women(woman_ids)
+        refresh_years(years)
+
+
+def rebuild():
+    with transaction.atomic():
+        WomanStat.objects.all().delete()
+        YearStat.objects.all().delete()
+        YearSectionStat.objects.all().delete()
+        refresh_women(Appearance.objects.values_list('woman_id', flat=True).distinct())
+        refresh_years(d.year for d in Issue.objects.dates('publishing_date', 'year'))
+
+
+def dashboard(top=20):
+    """Everything the statistics page shows, read from the rollup tables."""
+    years = list(YearStat.objects.all())
+
+    decades = {}
+    for stat in years:
+        decade = decades.setdefault(stat.year // 10 * 10, {'decade': stat.year // 10 * 10, 'issues': 0, 'appearances': 0, 'new_faces': 0})
+        decade['issues'] += stat.issues
+        decade['appearances'] += stat.appearances
+        decade['new_faces'] += stat.new_faces
+
+    sections = (
+        YearSectionStat.objects.values('section__name')
+        .annotate(total=Sum('appearances'))
+        .order_by('-total', 'section__name')
+    )
+
+    return {
+        'years': years,
+        'decades': [decades[d] for d in sorted(decades)],
+        'sections': list(sections),
+        'top_women': list(WomanStat.objects.select_related('woman').order_by('-appearances', 'woman__name')[:top]),
+    }
+
+
+@receiver(appearances_changed)
+def appearances_changed_receiver(sender, rows, years=(), **kwargs):
+    refresh(rows, years)
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def issue_changed(sender, instance, **kwargs):
+    year = instance.publishing_date.year
+    years = {year}
+    loaded = getattr(instance, '_loaded_year', None)
+    with transaction.atomic():
+        if loaded is not None and loaded != year:
+            # Moved to another year: the old one loses the issue, and its appearances move with it
+            years.add(loaded)
+            years |= refresh_women(Appearance.objects.filter(issue=instance).values_list('woman_id', flat=True))
+        refresh_years(years)
+    instance._loaded_year = year
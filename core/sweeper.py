@@ -0,0 +1,102 @@
+"""
+Background removal of media files left behind by deleted rows.
+
+Deletes only queue file names in OrphanedFile (in the same transaction as
+the rows they belonged to); the files themselves are removed here, off the
+request path, once that transaction has committed.
+"""
+import logging
+import threading
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import IssueCover, OrphanedFile
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+
+_wakeup = threading.Event()
+_lock = threading.Lock()
+_thread = None
+
+
+def queue_files(names):
+    """Queue storage names for removal once the current transaction commits."""
+    names = [name for name in names if name]
+    if not names:
+        return
+    OrphanedFile.objects.bulk_create([OrphanedFile(name=name) for name in names])
+    transaction.on_commit(schedule_sweep)
+
+
+def queue_column(model, column, where, params):
+    """
+    Queue every file referenced by model.column in the rows matching where,
+    with a single INSERT ... SELECT. Used by the set-based deletes.
+    """
+    table = OrphanedFile._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (name, queued_at) "
+            f"SELECT {column}, %s FROM {model._meta.db_table} WHERE ({where}) AND {column} <> ''",
+            [timezone.now(), *params],
+        )
+        queued = cursor.rowcount
+    if queued:
+        transaction.on_commit(schedule_sweep)
+
+
+def sweep(limit=None):
+    """Remove queued files from storage; returns how many were removed."""
+    removed = 0
+    while limit is None or removed < limit:
+        batch = list(OrphanedFile.objects.order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+
+        names = {f.name for f in batch}
+        # A name can be queued and then reused by a new upload; keep those files.
+        # Ask the primary: a read replica may not have the upload yet.
+        covers = IssueCover.objects.using(DEFAULT_DB_ALIAS)
+        in_use = set(covers.filter(image__in=names).values_list('image', flat=True))
+        in_use.update(covers.filter(thumbnail__in=names).values_list('thumbnail', flat=True))
+        for name in names - in_use:
+            try:
+                default_storage.delete(name)
+            except OSError:
+                logger.exception("Could not remove orphaned file %s", name)
+                continue
+            removed += 1
+        OrphanedFile.objects.filter(pk__in=[f.pk for f in batch]).delete()
+    return removed
+
+
+def _run():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        try:
+            sweep()
+        except Exception:
+            logger.exception("Media sweep failed")
+        finally:
+            close_old_connections()
+            connection.close()
+
+
+def schedule_sweep():
+    """Wake the sweeper thread, starting it on first use."""
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name='media-sweeper', daemon=True)
+            _thread.start()
+    _wakeup.set()
+
+
+@receiver(post_delete, sender=IssueCover)
+def cover_deleted(sender, instance, **kwargs):
+    queue_files([instance.image.name, instance.thumbnail.name])
@@ -0,0 +1,35 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+from core.assets import BUNDLES
+
+register = template.Library()
+
+TAGS = {
+    'css': '<link rel="stylesheet" href="{}">',
+    'js': '<script src="{}"></script>',
+}
+
+
+def _url(name, manifest):
+    if manifest is None or name in manifest:
+        return static(name)
+    # Not collected yet: static() would raise, so link the plain name
+    return staticfiles_storage.base_url + name
+
+
+def _urls(kind):
+    bundle, sources = BUNDLES[kind]
+    # Hashed names of the manifest storage ({} before collectstatic); None for other storages
+    manifest = getattr(staticfiles_storage, 'hashed_files', None)
+    if settings.ASSET_BUNDLES and (manifest is None or bundle in manifest):
+        return [static(bundle)]
+    return [_url(source, manifest) for source in sources]
+
+
+@register.simple_tag
+def bundle(kind):
+    """Render the <link>/<script> tags for the 'css' or 'js' bundle."""
+    return format_html_join('\n    ', TAGS[kind], ((url,) for url in _urls(kind)))
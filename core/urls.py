@@ -1,15 +1,19 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Read-only pages and streams have async twins for ASGI deployments
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
 
 urlpatterns = [
     path('', views.home, name='home'),
-    path('woman/', views.WomanListView.as_view(), name='woman_list'),
+    path('woman/', read_views.WomanListView.as_view(), name='woman_list'),
     path('woman/new/', views.WomanCreateView.as_view(), name='woman_create'),
-    path('woman/<int:pk>/', views.WomanDetailView.as_view(), name='woman_detail'),
+    path('woman/<int:pk>/', read_views.WomanDetailView.as_view(), name='woman_detail'),
     path('woman/<int:pk>/delete/', views.WomanDeleteView.as_view(), name='woman_delete'),
-    path('issue/', views.IssueListView.as_view(), name='issue_list'),
+    path('issue/', read_views.IssueListView.as_view(), name='issue_list'),
     path('issue/new/', views.IssueCreateView.as_view(), name='issue_create'),
-    path('issue/<int:pk>/', views.IssueDetailView.as_view(), name='issue_detail'),
+    path('issue/<int:pk>/', read_views.IssueDetailView.as_view(), name='issue_detail'),
     path('issue/<int:pk>/delete/', views.IssueDeleteView.as_view(), name='issue_delete'),
     path('woman/<int:pk>/appearance/new/', views.WomanAppearanceCreateView.as_view(), name='woman_appearance_create'),
     path('woman/<int:pk>/appearances/bulk/', views.WomanAppearanceBulkCreateView.as_view(), name='woman_appearance_bulk_add'),
@@ -19,6 +23,14 @@ urlpatterns = [
     path('appearance/<int:pk>/edit/issue/', views.IssueAppearanceUpdateView.as_view(), name='issue_appearance_edit'),
     path('issue/<int:issue_pk>/section/<int:section_pk>/edit/', views.IssueSectionUpdateView.as_view(), name='issue_section_update'),
     path('issue/<int:issue_pk>/section/<int:section_pk>/delete/', views.IssueSectionDeleteView.as_view(), name='issue_section_delete'),
+    path('issue/<int:pk>/covers/', views.IssueCoversView.as_view(), name='issue_covers'),
     path('issue/<int:issue_pk>/cover/url/', views.IssueCoverFromUrlView.as_view(), name='issue_cover_url_add'),
     path('issue/<int:pk>/cover/new/', views.IssueCoverCreateView.as_view(), name='issue_cover_create'),
+    path('stats/', views.StatsView.as_view(), name='stats'),
+    path('changes/', views.ChangesView.as_view(), name='changes'),
+    path('profiles/', views.ProfileListView.as_view(), name='profile_list'),
+    path('profiles/<str:name>/', views.ProfileDetailView.as_view(), name='profile_detail'),
+    path('import/', views.ImportJobCreateView.as_view(), name='import_job_create'),
+    path('import/<int:pk>/', views.ImportJobDetailView.as_view(), name='import_job_detail'),
+    path('import/<int:pk>/events/', read_views.ImportJobEventsView.as_view(), name='import_job_events'),
 ]
@@ -1,46 +1,70 @@
+import json
+import time
 import unicodedata
-from django.shortcuts import render, redirect
+from itertools import groupby
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, Prefetch
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
-from django.views.generic import ListView, DetailView, CreateView, DeleteView, UpdateView, FormView
-from django.urls import reverse_lazy
-from .models import Woman, Issue, Appearance, Section, IssueCover
+from django.views.generic import View, ListView, DetailView, CreateView, DeleteView, UpdateView, FormView, TemplateView
+from django.urls import reverse, reverse_lazy
+from .models import Woman, Issue, Appearance, Section, IssueCover, ImportJob
 from .forms import IssueForm, WomanAppearanceForm, IssueAppearanceForm, BulkAppearanceForm, IssueCoverUrlForm, IssueCoverForm
+from .coappearances import top_co_stars
+from . import changes, dimensions, images, ingest, profiling, stats
+from .signals import batched_appearance_changes
+from .deletion import fast_delete
 import urllib.request
-from django.core.files.base import ContentFile
 from datetime import date
 
 # ... (existing imports)
 
-class WomanAppearanceBulkCreateView(FormView):
+class UrlObjectsMixin:
+    """
+    Loads the rows named in the URL once per request, before any handler runs.
+    url_objects maps an attribute name to (model, URL kwarg); a missing row is a 404.
+    """
+    url_objects = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        for name, (model, kwarg) in self.url_objects.items():
+            setattr(self, name, get_object_or_404(model, pk=self.kwargs[kwarg]))
+        return super().dispatch(request, *args, **kwargs)
+
+class WomanAppearanceBulkCreateView(UrlObjectsMixin, FormView):
     form_class = BulkAppearanceForm
     template_name = 'core/appearance_bulk_form.html'
+    url_objects = {'woman': (Woman, 'pk')}
 
     def get_success_url(self):
         return reverse_lazy('woman_detail', kwargs={'pk': self.kwargs['pk']})
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['woman'] = Woman.objects.get(pk=kwargs.get('pk') or self.kwargs['pk'])
-        context['title'] = _("Bulk Add Appearances for %(woman)s") % {'woman': context['woman'].name}
+        context['woman'] = self.woman
+        context['title'] = _("Bulk Add Appearances for %(woman)s") % {'woman': self.woman.name}
         return context
 
     def form_valid(self, form):
-        woman = Woman.objects.get(pk=self.kwargs['pk'])
+        woman = self.woman
         # content is now a list of dicts from clean_content
         parsed_data = form.cleaned_data['content'] 
 
-        for data in parsed_data:
-            section, _ = Section.objects.get_or_create(name=data['section_name'])
-            issue, _ = Issue.objects.get_or_create(
-                publishing_date=data['publishing_date'],
-                edition=data['edition']
-            )
-
-            Appearance.objects.create(
-                woman=woman,
-                section=section,
-                issue=issue
-            )
+        with batched_appearance_changes():
+            for data in parsed_data:
+                issue, _ = Issue.objects.get_or_create(
+                    publishing_date=data['publishing_date'],
+                    edition=data['edition']
+                )
+
+                Appearance.objects.create(
+                    woman=woman,
+                    section_id=dimensions.section_id(data['section_name'], verify=True),
+                    issue=issue
+                )
             
         return super().form_valid(form)
 
@@ -53,6 +77,56 @@ def normalize_text(text):
         return ""
     return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII').lower()
 
+def year_navigation(years, current_year):
+    """Context for the first/previous/next/last year buttons of the issue grid."""
+    index = years.index(current_year)
+    return {
+        'current_year': current_year,
+        'years': years,
+        'first_year': years[0],
+        'last_year': years[-1],
+        'previous_year': years[index - 1] if index > 0 else None,
+        'next_year': years[index + 1] if index < len(years) - 1 else None,
+    }
+
+def issue_grid(queryset):
+    """
+    Issues for the cover grid: only the first cover is loaded, plus how many
+    there are; the card fetches the others from IssueCoversView when asked.
+    """
+    return queryset.annotate(cover_count=Count('covers')).prefetch_related(
+        Prefetch('covers', queryset=IssueCover.objects.order_by('pk')[:1], to_attr='primary_covers')
+    )
+
+def issue_appearances(issue):
+    """An issue's appearances in display order, with only the columns the page shows."""
+    return (
+        Appearance.objects.filter(issue=issue)
+        .select_related('woman', 'section')
+        .only('woman__name', 'section__name')
+        .order_by('section__name', 'section_id', 'woman__name')
+    )
+
+def pk_url(name):
+    """reverse() for a URL taking a pk, resolved once and then filled in per row."""
+    placeholder = '2147483647'
+    prefix, _, suffix = reverse(name, kwargs={'pk': placeholder}).rpartition(placeholder)
+    return lambda pk: f'{prefix}{pk}{suffix}'
+
+def section_groups(appearances):
+    """
+    Group appearances already ordered by section into one entry per section.
+    Row links are built here: a {% url %} per pill dominated large issues' render time.
+    """
+    woman_url, delete_url = pk_url('woman_detail'), pk_url('appearance_delete')
+    sections_data = []
+    for _section_id, group in groupby(appearances, key=lambda app: app.section_id):
+        apps = list(group)
+        for app in apps:
+            app.woman_url, app.delete_url = woman_url(app.woman_id), delete_url(app.pk)
+        sections_data.append({'section': apps[0].section, 'appearances': apps, 'count': len(apps)})
+    return sections_data
+
 class WomanListView(ListView):
     model = Woman
     template_name = 'core/woman_list.html'
@@ -84,6 +158,12 @@ class WomanDetailView(DetailView):
     template_name = 'core/woman_detail.html'
     context_object_name = 'woman'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Precomputed pairs: a single indexed query instead of a self-join on Appearance
+        context['co_stars'] = top_co_stars(self.object)
+        return context
+
 class IssueListView(ListView):
     model = Issue
     template_name = 'core/issue_list.html'
@@ -91,7 +171,7 @@ class IssueListView(ListView):
     ordering = ['publishing_date']
 
     def get_queryset(self):
-        queryset = super().get_queryset().prefetch_related('covers')
+        queryset = issue_grid(super().get_queryset())
         
         # Get all distinct years from the database
         # We need to list them to find prev/next/first/last
@@ -121,22 +201,7 @@ class IssueListView(ListView):
         if not hasattr(self, 'years') or not self.years:
             return context
 
-        context['current_year'] = self.current_year
-        context['years'] = self.years
-        
-        # Navigation logic
-        context['first_year'] = self.years[0]
-        context['last_year'] = self.years[-1]
-
-        # Previous/Next
-        try:
-            curr_index = self.years.index(self.current_year)
-            context['previous_year'] = self.years[curr_index - 1] if curr_index > 0 else None
-            context['next_year'] = self.years[curr_index + 1] if curr_index < len(self.years) - 1 else None
-        except ValueError:
-            # Should not happen as we validate current_year
-            pass
-            
+        context.update(year_navigation(self.years, self.current_year))
         return context
 
 class IssueDetailView(DetailView):
@@ -144,28 +209,154 @@ class IssueDetailView(DetailView):
     template_name = 'core/issue_detail.html'
     context_object_name = 'issue'
 
+    def get_queryset(self):
+        return Issue.objects.prefetch_related('covers')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        issue = self.object
-        
-        # Group appearances by section
-        appearances = issue.appearance_set.select_related('woman', 'section').order_by('section__name', 'woman__name')
-        
-        grouped_appearances = {}
-        for app in appearances:
-            if app.section not in grouped_appearances:
-                grouped_appearances[app.section] = []
-            grouped_appearances[app.section].append(app)
-            
-        # Convert to list of dicts for template
-        context['sections_data'] = [
-            {'section': section, 'appearances': apps} 
-            for section, apps in grouped_appearances.items()
+        # One ordered query, grouped as it streams: three queries whatever the issue's size
+        context['sections_data'] = section_groups(issue_appearances(self.object))
+        return context
+
+class IssueCoversView(View):
+    """All covers of an issue as JSON, for the grid's cover slider."""
+
+    def get(self, request, pk):
+        covers = [
+            {'id': cover.pk, 'url': (cover.thumbnail or cover.image).url}
+            for cover in IssueCover.objects.filter(issue_id=pk).order_by('pk')
         ]
-        
-        # Sort sections by name
-        context['sections_data'].sort(key=lambda x: x['section'].name)
-        
+        if not covers and not Issue.objects.filter(pk=pk).exists():
+            raise Http404
+        return JsonResponse({'covers': covers})
+
+# Changes per response; the feed is buffered whole under ASGI
+CHANGES_MAX = 10000
+
+class ChangesView(View):
+    """
+    The change feed as NDJSON: one line per change after ?since=<cursor>,
+    at most ?limit= (CHANGES_MAX) of them. Consumers resume from the last
+    line's cursor; fewer lines than the limit means they are caught up.
+    """
+
+    def get(self, request):
+        try:
+            since = int(request.GET.get('since', 0))
+            limit = min(int(request.GET.get('limit', CHANGES_MAX)), CHANGES_MAX)
+        except ValueError:
+            return HttpResponseBadRequest(_("since and limit must be integers"))
+        lines = (json.dumps(change, default=str) + '\n' for change in changes.feed(since, max(limit, 1)))
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+class ImportJobCreateView(CreateView):
+    """Stores an uploaded CSV and leaves the ingestion to the background worker."""
+    model = ImportJob
+    fields = ['file']
+    template_name = 'core/import_form.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        ingest.enqueue()
+        return response
+
+    def get_success_url(self):
+        return reverse_lazy('import_job_detail', kwargs={'pk': self.object.pk})
+
+class ImportJobDetailView(DetailView):
+    model = ImportJob
+    template_name = 'core/import_detail.html'
+    context_object_name = 'job'
+
+# Progress streams poll the job row; a stream ends after SSE_MAX_SECONDS and the
+# browser's EventSource reconnects, so no request holds a worker indefinitely
+SSE_POLL_SECONDS = 0.5
+SSE_KEEPALIVE_SECONDS = 15
+SSE_MAX_SECONDS = 120
+
+def sse_event(data, event=None):
+    prefix = f'event: {event}\n' if event else ''
+    return f'{prefix}data: {json.dumps(data)}\n\n'
+
+def sse_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+class ImportJobEventsView(View):
+    """Server-Sent Events with an import job's counters until it finishes."""
+
+    def get(self, request, pk):
+        get_object_or_404(ImportJob, pk=pk)
+        return sse_response(self.events(pk))
+
+    def events(self, pk):
+        yield 'retry: 2000\n\n'
+        last, last_sent = None, time.monotonic()
+        deadline = last_sent + SSE_MAX_SECONDS
+        while time.monotonic() < deadline:
+            job = ImportJob.objects.get(pk=pk)
+            progress = job.progress()
+            if progress != last:
+                yield sse_event(progress)
+                last, last_sent = progress, time.monotonic()
+            elif time.monotonic() - last_sent > SSE_KEEPALIVE_SECONDS:
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+            if job.finished:
+                yield sse_event(progress, event='end')
+                return
+            time.sleep(SSE_POLL_SECONDS)
+
+class StatsView(TemplateView):
+    template_name = 'core/stats.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Rollup tables only: no GROUP BY over Appearance at request time
+        context.update(stats.dashboard())
+        return context
+
+@method_decorator(staff_member_required, name='dispatch')
+class ProfileListView(TemplateView):
+    """Request profiles captured by core.profiling, with a fresh token to capture more."""
+    template_name = 'core/profile_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        profiles = profiling.list_profiles()
+        for profile in profiles:
+            profile['sql_ms'] = sum(query['ms'] for query in profile['queries'])
+        context.update(profiles=profiles, param=profiling.PARAM, token=profiling.make_token(self.request.user))
+        return context
+
+@method_decorator(staff_member_required, name='dispatch')
+class ProfileDetailView(TemplateView):
+    template_name = 'core/profile_detail.html'
+    sorts = ['cumulative', 'tottime', 'ncalls']
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        capture = profiling.load_capture(self.kwargs['name'])
+        if capture is None:
+            raise Http404
+        sort = self.request.GET.get('sort')
+        if sort not in self.sorts:
+            sort = self.sorts[0]
+        # One row per template: includes are rendered once per item
+        templates = {}
+        for rendered in capture['templates']:
+            row = templates.setdefault(rendered['name'], {'name': rendered['name'], 'count': 0, 'ms': 0})
+            row['count'] += 1
+            row['ms'] += rendered['ms']
+        context.update(
+            capture=capture, sort=sort, sorts=self.sorts,
+            stats=profiling.render_stats(capture['name'], sort),
+            sql_ms=sum(query['ms'] for query in capture['queries']),
+            templates=sorted(templates.values(), key=lambda row: -row['ms']),
+        )
         return context
 
 class WomanCreateView(CreateView):
@@ -184,12 +375,20 @@ class IssueCreateView(CreateView):
     def get_success_url(self):
         return reverse_lazy('issue_detail', kwargs={'pk': self.object.pk})
 
-class WomanDeleteView(DeleteView):
+class FastDeleteMixin:
+    """Deletes the object and its cascade with set-based SQL instead of the ORM collector."""
+
+    def form_valid(self, form):
+        success_url = self.get_success_url()
+        fast_delete(self.model, [self.object.pk])
+        return HttpResponseRedirect(success_url)
+
+class WomanDeleteView(FastDeleteMixin, DeleteView):
     model = Woman
     template_name = 'core/confirm_delete.html'
     success_url = reverse_lazy('woman_list')
 
-class IssueDeleteView(DeleteView):
+class IssueDeleteView(FastDeleteMixin, DeleteView):
     model = Issue
     template_name = 'core/confirm_delete.html'
     success_url = reverse_lazy('issue_list')
@@ -198,28 +397,30 @@ from .forms import WomanAppearanceForm, IssueAppearanceForm
 from .models import Appearance, Section
 from django import forms
 
-class WomanAppearanceCreateView(CreateView):
+class WomanAppearanceCreateView(UrlObjectsMixin, CreateView):
     model = Appearance
     form_class = WomanAppearanceForm
     template_name = 'core/appearance_form_woman.html'
+    url_objects = {'woman': (Woman, 'pk')}
     
     def get_success_url(self):
         return reverse_lazy('woman_detail', kwargs={'pk': self.kwargs['pk']})
 
     def form_valid(self, form):
-        form.instance.woman = Woman.objects.get(pk=self.kwargs['pk'])
+        form.instance.woman = self.woman
         return super().form_valid(form)
         
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['woman'] = Woman.objects.get(pk=self.kwargs['pk'])
+        context['woman'] = self.woman
         context['sections'] = Section.objects.all() # For datalist
         return context
 
-class IssueAppearanceCreateView(CreateView):
+class IssueAppearanceCreateView(UrlObjectsMixin, CreateView):
     model = Appearance
     form_class = IssueAppearanceForm
     template_name = 'core/appearance_form_issue.html'
+    url_objects = {'issue': (Issue, 'pk')}
 
     def get_success_url(self):
         return reverse_lazy('issue_detail', kwargs={'pk': self.kwargs['pk']})
@@ -237,12 +438,12 @@ class IssueAppearanceCreateView(CreateView):
         return initial
 
     def form_valid(self, form):
-        form.instance.issue = Issue.objects.get(pk=self.kwargs['pk'])
+        form.instance.issue = self.issue
         return super().form_valid(form)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['issue'] = Issue.objects.get(pk=self.kwargs['pk'])
+        context['issue'] = self.issue
         context['women'] = Woman.objects.all() # For datalist
         context['sections'] = Section.objects.all() # For datalist
         return context
@@ -251,9 +452,12 @@ class WomanAppearanceUpdateView(UpdateView):
     model = Appearance
     form_class = WomanAppearanceForm
     template_name = 'core/appearance_form_woman.html'
+
+    def get_queryset(self):
+        return Appearance.objects.select_related('woman', 'section')
     
     def get_success_url(self):
-        return reverse_lazy('woman_detail', kwargs={'pk': self.object.woman.pk})
+        return reverse_lazy('woman_detail', kwargs={'pk': self.object.woman_id})
 
     def get_initial(self):
         initial = super().get_initial()
@@ -264,7 +468,6 @@ class WomanAppearanceUpdateView(UpdateView):
         context = super().get_context_data(**kwargs)
         context['woman'] = self.object.woman
         context['sections'] = Section.objects.all() # For datalist
-        context['sections'] = Section.objects.all() # For datalist
         context['title'] = _("Edit Appearance for %(woman)s") % {'woman': self.object.woman.name}
         return context
 
@@ -273,8 +476,11 @@ class IssueAppearanceUpdateView(UpdateView):
     form_class = IssueAppearanceForm
     template_name = 'core/appearance_form_issue.html'
 
+    def get_queryset(self):
+        return Appearance.objects.select_related('woman', 'issue', 'section')
+
     def get_success_url(self):
-        return reverse_lazy('issue_detail', kwargs={'pk': self.object.issue.pk})
+        return reverse_lazy('issue_detail', kwargs={'pk': self.object.issue_id})
         
     def get_initial(self):
         initial = super().get_initial()
@@ -287,7 +493,6 @@ class IssueAppearanceUpdateView(UpdateView):
         context['issue'] = self.object.issue
         context['women'] = Woman.objects.all() # For datalist
         context['sections'] = Section.objects.all() # For datalist
-        context['sections'] = Section.objects.all() # For datalist
         context['title'] = _("Edit Appearance in %(issue)s") % {'issue': self.object.issue}
         return context
 
@@ -304,18 +509,16 @@ class AppearanceDeleteView(DeleteView):
 class IssueSectionUpdateForm(forms.Form):
     section_name = forms.CharField(label='New Section Name', max_length=255, widget=forms.TextInput(attrs={'list': 'sections-list', 'class': 'form-control', 'autocomplete': 'off'}))
 
-class IssueSectionUpdateView(FormView):
+class IssueSectionUpdateView(UrlObjectsMixin, FormView):
     template_name = 'core/appearance_form_issue.html' # Reuse similar template
     form_class = IssueSectionUpdateForm
+    url_objects = {'issue': (Issue, 'issue_pk'), 'section': (Section, 'section_pk')}
 
     def get_success_url(self):
         return reverse_lazy('issue_detail', kwargs={'pk': self.kwargs['issue_pk']})
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        self.issue = Issue.objects.get(pk=self.kwargs['issue_pk'])
-        self.section = Section.objects.get(pk=self.kwargs['section_pk'])
-        context['issue'] = self.issue
         context['issue'] = self.issue
         context['title'] = _("Update Section '%(section)s' for all appearances in %(issue)s") % {'section': self.section.name, 'issue': self.issue}
         context['sections'] = Section.objects.all() # For datalist
@@ -324,36 +527,34 @@ class IssueSectionUpdateView(FormView):
     
     def get_initial(self):
         initial = super().get_initial()
-        section = Section.objects.get(pk=self.kwargs['section_pk'])
-        initial['section_name'] = section.name
+        initial['section_name'] = self.section.name
         return initial
 
     def form_valid(self, form):
-        issue = Issue.objects.get(pk=self.kwargs['issue_pk'])
-        old_section = Section.objects.get(pk=self.kwargs['section_pk'])
+        issue = self.issue
+        old_section = self.section
         new_section_name = form.cleaned_data['section_name']
         
-        new_section, _ = Section.objects.get_or_create(name=new_section_name)
+        new_section_id = dimensions.section_id(new_section_name, verify=True)
         
         # Update all appearances for this issue and old_section
-        Appearance.objects.filter(issue=issue, section=old_section).update(section=new_section)
+        Appearance.objects.filter(issue=issue, section=old_section).update(section_id=new_section_id)
         
         return super().form_valid(form)
 
-class IssueSectionDeleteView(DeleteView):
+class IssueSectionDeleteView(UrlObjectsMixin, DeleteView):
     # This is a bit tricky because DeleteView expects a single object.
     # We are deleting a group of objects. We can simulate it.
     template_name = 'core/confirm_delete.html'
+    url_objects = {'issue': (Issue, 'issue_pk'), 'section': (Section, 'section_pk')}
 
     def get_object(self, queryset=None):
         # We return the Section object just to have something to render in the template confirmation
-        return Section.objects.get(pk=self.kwargs['section_pk'])
+        return self.section
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        issue = Issue.objects.get(pk=self.kwargs['issue_pk'])
-        section = self.get_object()
-        count = Appearance.objects.filter(issue=issue, section=section).count()
+        issue, section = self.issue, self.section
         count = Appearance.objects.filter(issue=issue, section=section).count()
         context['object_name'] = _("Section '%(section)s' from %(issue)s (will delete %(count)s appearances)") % {'section': section.name, 'issue': issue, 'count': count}
         context['cancel_url'] = reverse_lazy('issue_detail', kwargs={'pk': issue.pk})
@@ -362,26 +563,26 @@ class IssueSectionDeleteView(DeleteView):
     def get_success_url(self):
         return reverse_lazy('issue_detail', kwargs={'pk': self.kwargs['issue_pk']})
 
-    def delete(self, request, *args, **kwargs):
-        issue = Issue.objects.get(pk=self.kwargs['issue_pk'])
-        section = self.get_object()
-        Appearance.objects.filter(issue=issue, section=section).delete()
+    def form_valid(self, form):
+        # DeleteView would delete the Section itself; only its appearances in this issue go
+        pks = Appearance.objects.filter(issue_id=self.kwargs['issue_pk'], section=self.object).values_list('pk', flat=True)
+        fast_delete(Appearance, pks)
         return HttpResponseRedirect(self.get_success_url())
 
-class IssueCoverFromUrlView(FormView):
+class IssueCoverFromUrlView(UrlObjectsMixin, FormView):
     template_name = 'core/cover_from_url_form.html'
     form_class = IssueCoverUrlForm
+    url_objects = {'issue': (Issue, 'issue_pk')}
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['issue'] = Issue.objects.get(pk=self.kwargs['issue_pk'])
-        context['issue'] = Issue.objects.get(pk=self.kwargs['issue_pk'])
+        context['issue'] = self.issue
         context['title'] = _("Add Cover from URL for %(issue)s") % {'issue': context['issue']}
         return context
 
     def form_valid(self, form):
         url = form.cleaned_data['url']
-        issue = Issue.objects.get(pk=self.kwargs['issue_pk'])
+        issue = self.issue
         
         try:
             # Download image
@@ -394,17 +595,26 @@ class IssueCoverFromUrlView(FormView):
             )
             with urllib.request.urlopen(req) as response:
                 if response.getcode() == 200:
-                    image_content = response.read()
+                    length = response.headers.get('Content-Length')
+                    if length and length.isdigit() and int(length) > settings.COVER_MAX_BYTES:
+                        raise ValueError(f'larger than {settings.COVER_MAX_BYTES // 2 ** 20} MB')
                     # Guess filename from URL or default
                     filename = url.split('/')[-1].split('?')[0]
                     if not filename:
                         filename = "cover.jpg"
-                    
-                    cover = IssueCover(issue=issue)
-                    cover.image.save(filename, ContentFile(image_content), save=True)
+
+                    # Spooled to disk past a few MB and cut off at the size limit, whatever Content-Length said
+                    chunks = iter(lambda: response.read(images.CHUNK_SIZE), b'')
+                    with images.spool(chunks, settings.COVER_MAX_BYTES) as source:
+                        content_hash = images.file_hash(source)
+                        image, thumbnail, _size = images.store_cover(source, filename, content_hash)
+                    IssueCover.objects.create(issue=issue, image=image, thumbnail=thumbnail, content_hash=content_hash)
                 else:
                     form.add_error('url', f"Failed to download image. Status code: {response.getcode()}")
                     return self.form_invalid(form)
+        except ValueError as e:
+            form.add_error('url', _("Invalid image: %(error)s") % {'error': e})
+            return self.form_invalid(form)
         except Exception as e:
             form.add_error('url', f"Error downloading image: {str(e)}")
             return self.form_invalid(form)
@@ -414,19 +624,24 @@ class IssueCoverFromUrlView(FormView):
     def get_success_url(self):
         return reverse_lazy('issue_detail', kwargs={'pk': self.kwargs['issue_pk']})
 
-class IssueCoverCreateView(CreateView):
+class IssueCoverCreateView(UrlObjectsMixin, CreateView):
     model = IssueCover
     form_class = IssueCoverForm
     template_name = 'core/cover_form.html'
+    url_objects = {'issue': (Issue, 'pk')}
 
     def form_valid(self, form):
-        form.instance.issue = Issue.objects.get(pk=self.kwargs['pk'])
-        return super().form_valid(form)
+        form.instance.issue = self.issue
+        try:
+            return super().form_valid(form)
+        except ValueError as e:
+            # Pixels that only fail to decode once the ingest policy loads them
+            form.add_error('image', _("Invalid image: %(error)s") % {'error': e})
+            return self.form_invalid(form)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['issue'] = Issue.objects.get(pk=self.kwargs['pk'])
-        context['issue'] = Issue.objects.get(pk=self.kwargs['pk'])
+        context['issue'] = self.issue
         context['title'] = _("Upload Cover for %(issue)s") % {'issue': context['issue']}
         return context
 
@@ -0,0 +1,105 @@
+"""
+Worker warm-up: pay the cold-start costs before the first request does.
+
+A fresh process compiles each template, loads the translation catalogues,
+builds the URL resolver (once per language, under i18n_patterns) and fills
+the name caches of core.dimensions on first use. run() does all of that up
+front and logs how long each phase took.
+
+With DJANGO_WARMUP=1, CoreConfig.ready() runs the phases that need no
+database, so a server that loads the app before forking (gunicorn --preload)
+hands warm workers out. The warmup command runs every phase, the database
+ones included, and can be called from a pre-fork hook.
+"""
+import logging
+import time
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import NoReverseMatch, get_resolver, reverse
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def templates():
+    """Compile every core template into the cached loader; returns how many."""
+    root = Path(apps.get_app_config('core').path) / 'templates'
+    names = sorted(path.relative_to(root).as_posix() for path in (root / 'core').rglob('*.html'))
+    for engine in engines.all():
+        for name in names:
+            engine.get_template(name)
+    return len(names)
+
+
+def translations():
+    """Load the catalogue of every language; returns how many."""
+    for code, _ in settings.LANGUAGES:
+        with translation.override(code):
+            translation.gettext('')
+    return len(settings.LANGUAGES)
+
+
+def _url_names(resolver, prefix=''):
+    """(name, kwargs) for every named pattern of resolver and its namespaces."""
+    for name, entries in resolver.reverse_dict.lists():
+        if isinstance(name, str):
+            params = entries[0][0][0][1]
+            yield prefix + name, {param: '1' for param in params}
+    for namespace, (_, sub) in resolver.namespace_dict.items():
+        yield from _url_names(sub, f'{prefix}{namespace}:')
+
+
+def urls():
+    """Build the resolver and reverse every named URL in every language; returns how many reversed."""
+    reversed_ = 0
+    for code, _ in settings.LANGUAGES:
+        with translation.override(code):
+            for name, kwargs in _url_names(get_resolver()):
+                try:
+                    reverse(name, kwargs=kwargs)
+                    reversed_ += 1
+                except NoReverseMatch:
+                    # Patterns restricted to a fixed set of values (admin app labels) refuse the placeholder
+                    pass
+    return reversed_
+
+
+def issue_years():
+    """Run the year scan of the issue grid; returns how many years there are."""
+    from .models import Issue
+    return len(Issue.objects.dates('publishing_date', 'year'))
+
+
+def dimension_caches():
+    """Load the woman and section name caches; returns how many names they hold."""
+    from . import dimensions
+    return sum(len(cache._current()) for cache in (dimensions.women, dimensions.sections))
+
+
+PHASES = [
+    ('templates', templates),
+    ('translations', translations),
+    ('urls', urls),
+]
+DATABASE_PHASES = [
+    ('issue years', issue_years),
+    ('dimension caches', dimension_caches),
+]
+
+
+def run(database=True):
+    """Run the warm-up phases; returns [(phase, count, seconds)] and logs each one."""
+    timings = []
+    for phase, function in PHASES + (DATABASE_PHASES if database else []):
+        start = time.perf_counter()
+        count = function()
+        elapsed = time.perf_counter() - start
+        logger.info("Warm-up %s: %d in %.1f ms", phase, count, elapsed * 1000)
+        timings.append((phase, count, elapsed))
+    if database:
+        # Forked workers must not share the connections opened here
+        connections.close_all()
+    return timings
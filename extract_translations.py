@@ -1,86 +1,200 @@
+import argparse
+import ast
+import hashlib
+import json
 import os
 import re
 from pathlib import Path
 from datetime import datetime
 
+from compile_translations import read_po
+
 # Configuration
 BASE_DIR = Path('.')
 LOCALE_DIR = BASE_DIR / 'locale'
 LANGUAGES = ['en', 'pt_BR']
 
-def extract_strings():
-    """Extract strings marked for translation in .py and .html files."""
+# Only these directories hold translatable sources; media, the database and
+# virtualenvs are never read.
+SOURCE_ROOTS = ['core', 'magazine_list']
+SKIP_DIRS = {'__pycache__', 'static', 'migrations'}
+EXTENSIONS = ('.py', '.html')
+
+CACHE_FILE = BASE_DIR / '.translations-cache.json'
+
+# Regex for python: _("string") or _('string')
+# Also handles verbose_name=_("string")
+py_pattern = re.compile(r'''_\(\s*("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')\s*\)''')
+
+# Regex for templates: {% trans "string" %} / {% translate 'string' %} and _("string") in filter arguments
+tpl_pattern = re.compile(r'''{%\s*(?:trans|translate)\s+("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')''')
+tpl_underscore_pattern = re.compile(r'''_\(("[^"]*"|'[^']*')\)''')
+
+# {% blocktrans [...] %}...{% endblocktrans %}, variables become %(name)s like Django's makemessages
+blocktrans_pattern = re.compile(
+    r'{%\s*block(?:trans|translate)\b(.*?)%}(.*?){%\s*endblock(?:trans|translate)\s*%}', re.DOTALL
+)
+variable_pattern = re.compile(r'{{\s*([\w.]+)\s*}}')
+
+
+def _literal(token):
+    try:
+        return ast.literal_eval(token)
+    except (ValueError, SyntaxError):
+        return token[1:-1]
+
+
+def _blocktrans(options, body):
+    if 'trimmed' in options.split():
+        body = ' '.join(line.strip() for line in body.strip().splitlines() if line.strip())
+    body = body.replace('%', '%%')
+    return variable_pattern.sub(lambda m: f'%({m.group(1)})s', body)
+
+
+def strings_in(path, content):
+    """Return the translatable strings found in one source file."""
+    if path.suffix == '.py':
+        return [_literal(m) for m in py_pattern.findall(content)]
+
+    strings = [_literal(m) for m in tpl_pattern.findall(content)]
+    strings += [m[1:-1] for m in tpl_underscore_pattern.findall(content)]
+    strings += [_blocktrans(options, body) for options, body in blocktrans_pattern.findall(content)]
+    return strings
+
+
+def source_files():
+    for root in SOURCE_ROOTS:
+        for dirpath, dirnames, filenames in os.walk(BASE_DIR / root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for file in filenames:
+                if file.endswith(EXTENSIONS):
+                    yield Path(dirpath) / file
+
+
+def extract_strings(use_cache=True):
+    """
+    Extract strings marked for translation in .py and .html files.
+
+    Files whose mtime and size match the cache are not read at all; files
+    that were touched but whose content hash is unchanged are not re-parsed.
+    """
+    cache = {}
+    if use_cache and CACHE_FILE.exists():
+        try:
+            cache = json.loads(CACHE_FILE.read_text(encoding='utf-8'))
+        except ValueError:
+            cache = {}
+
+    new_cache = {}
     strings = set()
-    
-    # Regex for python: _("string") or _('string')
-    # Also handles verbose_name=_("string")
-    py_pattern = re.compile(r'_\(["\'](.*?)["\']\)')
-    
-    # Regex for templates: {% trans "string" %} or {% trans 'string' %}
-    # handling blocktrans is harder, doing simple extraction for now
-    tpl_pattern = re.compile(r'{%\s*trans\s+["\'](.*?)["\']\s*%}')
-    
-    # Blocktrans extraction (basic)
-    # blocktrans_pattern = re.compile(r'{%\s*blocktrans.*?%}(.*?){%\s*endblocktrans\s*%}', re.DOTALL) 
-    # Not implementing blocktrans complex extraction for this snippet, relying on simple keys.
-
-    for root, _, files in os.walk(BASE_DIR):
-        if 'venv' in root or '.git' in root:
+    parsed = 0
+
+    for path in source_files():
+        key = path.as_posix()
+        stat = path.stat()
+        entry = cache.get(key)
+
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            new_cache[key] = entry
+            strings.update(entry['strings'])
             continue
-            
-        for file in files:
-            path = Path(root) / file
-            content = ""
-            try:
-                content = path.read_text(encoding='utf-8')
-            except Exception:
-                continue
-
-            if file.endswith('.py'):
-                matches = py_pattern.findall(content)
-                strings.update(matches)
-            elif file.endswith('.html'):
-                matches = tpl_pattern.findall(content)
-                strings.update(matches)
-                
-    return sorted(list(strings))
-
-def create_po_file(language, strings):
-    """Create a .po file for the given language."""
+
+        try:
+            data = path.read_bytes()
+            content = data.decode('utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+
+        digest = hashlib.sha1(data).hexdigest()
+        if entry and entry['hash'] == digest:
+            found = entry['strings']
+        else:
+            found = sorted(set(strings_in(path, content)))
+            parsed += 1
+
+        new_cache[key] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest, 'strings': found}
+        strings.update(found)
+
+    if use_cache:
+        CACHE_FILE.write_text(json.dumps(new_cache), encoding='utf-8')
+
+    print(f"Parsed {parsed} of {len(new_cache)} source files.")
+    return sorted(s for s in strings if s)
+
+
+def escape(s):
+    return s.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\t', '\\t')
+
+
+def _without_date(content):
+    return re.sub(r'POT-Creation-Date: [^\\]*', '', content, count=1)
+
+
+def create_po_file(language, strings, merge=True):
+    """
+    Write the .po file for the given language.
+
+    In merge mode existing translations are kept and entries that are no
+    longer in the sources are kept as obsolete (#~) comments, like msgmerge.
+    """
     lc_messages = LOCALE_DIR / language / 'LC_MESSAGES'
     lc_messages.mkdir(parents=True, exist_ok=True)
-    
+
     po_file = lc_messages / 'django.po'
-    
+
+    existing = read_po(po_file) if merge and po_file.exists() else {}
+
     now = datetime.now().strftime('%Y-%m-%d %H:%M%z')
-    
-    content = f"""msgid ""
-msgstr ""
-"Project-Id-Version: PACKAGE VERSION\\n"
-"Report-Msgid-Bugs-To: \\n"
-"POT-Creation-Date: {now}\\n"
-"PO-Revision-Date: YEAR-MO-DA HO:MI+ZONE\\n"
-"Last-Translator: FULL NAME <EMAIL@ADDRESS>\\n"
-"Language-Team: LANGUAGE <LL@li.org>\\n"
-"Language: {language}\\n"
-"MIME-Version: 1.0\\n"
-"Content-Type: text/plain; charset=UTF-8\\n"
-"Content-Transfer-Encoding: 8bit\\n"
-
-"""
-    
+
+    header = existing.get('')
+    if header:
+        header = re.sub(r'POT-Creation-Date: [^\n]*', f'POT-Creation-Date: {now}', header)
+    else:
+        header = (
+            "Project-Id-Version: PACKAGE VERSION\n"
+            "Report-Msgid-Bugs-To: \n"
+            f"POT-Creation-Date: {now}\n"
+            "PO-Revision-Date: YEAR-MO-DA HO:MI+ZONE\n"
+            "Last-Translator: FULL NAME <EMAIL@ADDRESS>\n"
+            "Language-Team: LANGUAGE <LL@li.org>\n"
+            f"Language: {language}\n"
+            "MIME-Version: 1.0\n"
+            "Content-Type: text/plain; charset=UTF-8\n"
+            "Content-Transfer-Encoding: 8bit\n"
+        )
+
+    parts = ['msgid ""\nmsgstr ""\n']
+    parts.extend(f'"{escape(line)}"\n' for line in header.splitlines(keepends=True))
+    parts.append('\n')
+
     for s in strings:
-        # Escape quotes
-        safe_s = s.replace('"', '\\"')
-        content += f'msgid "{safe_s}"\n'
-        content += f'msgstr ""\n\n'
-        
+        parts.append(f'msgid "{escape(s)}"\n')
+        parts.append(f'msgstr "{escape(existing.get(s, ""))}"\n\n')
+
+    current = set(strings)
+    previous = read_po(po_file, obsolete=True) if merge and po_file.exists() else {}
+    for s, translation in previous.items():
+        if s and s not in current and translation:
+            parts.append(f'#~ msgid "{escape(s)}"\n')
+            parts.append(f'#~ msgstr "{escape(translation)}"\n\n')
+
+    content = ''.join(parts)
+    if po_file.exists() and _without_date(po_file.read_text(encoding='utf-8')) == _without_date(content):
+        print(f"Unchanged {po_file}")
+        return
+
     po_file.write_text(content, encoding='utf-8')
-    print(f"Created {po_file}")
+    print(f"{'Updated' if existing else 'Created'} {po_file}")
+
 
 if __name__ == "__main__":
-    found_strings = extract_strings()
+    parser = argparse.ArgumentParser(description="Extract translatable strings into locale/*/LC_MESSAGES/django.po")
+    parser.add_argument('--no-cache', action='store_true', help="Re-read every source file")
+    parser.add_argument('--overwrite', action='store_true', help="Discard existing translations")
+    args = parser.parse_args()
+
+    found_strings = extract_strings(use_cache=not args.no_cache)
     print(f"Found {len(found_strings)} unique strings.")
-    
+
     for lang in LANGUAGES:
-        create_po_file(lang, found_strings)
+        create_po_file(lang, found_strings, merge=not args.overwrite)
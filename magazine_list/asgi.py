@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'magazine_list.settings')
+# Serve the read-only pages with core.async_views (settings.ASYNC_READ_VIEWS)
+os.environ.setdefault('DJANGO_ASYNC_READ_VIEWS', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,6 +65,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.prerender',
             ],
         },
     },
@@ -70,6 +73,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'magazine_list.wsgi.application'
 
+# Route the read-only pages to core.async_views. magazine_list/asgi.py turns
+# this on; under WSGI the async views would only add overhead.
+ASYNC_READ_VIEWS = os.environ.get('DJANGO_ASYNC_READ_VIEWS') == '1'
+
+# Compile the templates, load the catalogues and build the URL resolver while
+# the app loads (core/warmup.py), so workers forked after it start warm.
+WARMUP = os.environ.get('DJANGO_WARMUP') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -81,6 +92,23 @@ DATABASES = {
     }
 }
 
+# Optional read replica (core/replica.py): a copy of db.sqlite3 refreshed by the
+# refresh_replica command. Reads of core models go to it while it is at most
+# REPLICA_MAX_STALENESS seconds old; writes and the writer's next reads use the primary.
+READ_REPLICA = os.environ.get('DJANGO_READ_REPLICA') == '1'
+REPLICA_MAX_STALENESS = 30
+
+if READ_REPLICA:
+    # WAL lets the backup read a snapshot without blocking the importers
+    DATABASES['default']['OPTIONS'] = {'init_command': 'PRAGMA journal_mode=WAL;'}
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['core.replica.ReplicaRouter']
+    MIDDLEWARE.append('core.replica.ReplicaStickinessMiddleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -127,6 +155,44 @@ LOCALE_PATHS = [
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Bundles written by the build_assets command, picked up by collectstatic
+ASSET_BUILD_DIR = BASE_DIR / 'assets_build'
+STATICFILES_DIRS = [ASSET_BUILD_DIR] if ASSET_BUILD_DIR.exists() else []
+
+# Serve the minified bundles instead of the individual files
+ASSET_BUNDLES = not DEBUG
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # Fingerprinted names (style.4f2a1c.css) so assets can be cached for a year
+        'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+    },
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# How core.media.serve sends files: '' streams them from Django, 'x-accel-redirect'
+# (nginx) or 'x-sendfile' (Apache, lighttpd) leave the bytes to the front server
+MEDIA_SENDFILE = os.environ.get('DJANGO_MEDIA_SENDFILE', '')
+# Internal nginx location aliasing MEDIA_ROOT, used with 'x-accel-redirect'
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Cover ingest policy (core.images): uploads over COVER_MAX_BYTES or COVER_MAX_PIXELS
+# are refused; bigger covers, other formats and embedded metadata are re-encoded
+COVER_MAX_BYTES = 25 * 1024 * 1024
+COVER_MAX_PIXELS = 80_000_000
+COVER_MAX_SIDE = 2400
+COVER_FORMAT = os.environ.get('DJANGO_COVER_FORMAT', 'JPEG')  # or 'WEBP'
+COVER_QUALITY = 85
+
+# Spreadsheets uploaded for background import (kept outside MEDIA_ROOT)
+IMPORT_ROOT = BASE_DIR / 'imports'
+
+# Request profiles captured by core.profiling for staff (kept outside MEDIA_ROOT)
+PROFILE_ROOT = BASE_DIR / 'profiles'